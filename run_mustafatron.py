@@ -1,4 +1,5 @@
 import argparse
+import asyncio
 from groupy.client import Client
 from espn_api.football import League
 
@@ -7,16 +8,26 @@ from groupme.config import TOKEN, GROUP_ID
 
 from viz_reports.data.configs import keys
 import viz_reports.image_utils as reports
+import viz_reports.pipeline as pipeline
+import viz_reports.report_server as report_server
+import viz_reports.scheduler as scheduler
+## The report modules import each other by bare name (viz_reports on the path), so the shared transport has to be
+### that same `transport` module, not a second viz_reports.transport copy with its own session and metrics
+import transport
 
 ## Command line arguments
 parser = argparse.ArgumentParser(
     description='Run MustafaTron 3000 to create and/or post weekly fantasy reports.')
-parser.add_argument('-w', '--week', type=int, metavar='', required=True, help='Week number')
+parser.add_argument('-w', '--week', type=int, metavar='', help='Week number (not needed for "schedule")')
 parser.add_argument('-m', '--mode', type=str, metavar='', required=True,
-                    help='Mode (either "create", "post", or "both")')
+                    help='Mode (either "create", "post", "both", "serve", or "schedule")')
+parser.add_argument('-p', '--port', type=int, metavar='', default=8000, help='Port for "serve" mode')
 args = parser.parse_args()
+if args.week is None and args.mode != 'schedule':
+    parser.error(f'--week is required for mode "{args.mode}"')
 
-### Establish ESPN API connection
+### Establish ESPN API connection (all ESPN HTTP goes through the shared pooled transport)
+transport.install_espn_transport()
 league = League(league_id=keys['league_id'], year=2022,
                 espn_s2=keys['espn_s2'],
                 swid=keys['swid'])
@@ -30,7 +41,13 @@ def create_visuals(week):
     reports.save_all_visuals(league=league, week=week)
 
 def post_weekly_reports(week):
-    gm.post_all_reports(week=week)
+    image_paths, captions = pipeline.load_manifest(week)
+    gm.post_all_reports(client, bot, image_paths, captions)
+
+def create_and_post_weekly_reports(week):
+    ## Images are posted as soon as they're rendered, while later charts are still being drawn
+    asyncio.run(pipeline.run_weekly_reports(league, week,
+                                            post=lambda path, caption: gm.post_image(client, bot, path, caption)))
 
 if __name__ == "__main__":
     if args.mode == 'create':
@@ -38,7 +55,11 @@ if __name__ == "__main__":
     elif args.mode == 'post':
         post_weekly_reports(args.week)
     elif args.mode == 'both':
-        create_visuals(args.week)
-        post_weekly_reports(args.week)
+        create_and_post_weekly_reports(args.week)
+    elif args.mode == 'serve':
+        report_server.serve_reports(league, args.week, port=args.port)
+    elif args.mode == 'schedule':
+        ## Posts each week once ESPN finalizes it, then any charts changed by stat corrections
+        scheduler.run_scheduler(league, post=lambda path, caption: gm.post_image(client, bot, path, caption))
     else:
-        raise ValueError("Mode should be one of 'create', 'post', or 'both'.")
\ No newline at end of file
+        raise ValueError("Mode should be one of 'create', 'post', 'both', 'serve', or 'schedule'.")
\ No newline at end of file
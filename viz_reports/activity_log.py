@@ -0,0 +1,127 @@
+import os
+import json
+import pandas as pd
+from espn_api.football import League
+from typing import Iterator
+
+ACTIVITY_LOG_DIR = 'data/activity'
+LOG_COLUMNS = ['date', 'team_id', 'team_name', 'team_owner', 'action',
+               'player_id', 'player_name', 'position', 'bid_amount']
+
+def get_activity_log_path(league: League) -> str:
+    """Path of the local append-only activity log for a league/season."""
+    return os.path.join(ACTIVITY_LOG_DIR, f'activity-{league.league_id}-{league.year}.jsonl')
+
+def iter_league_activity(league: League, page_size: int = 25, msg_type: str = None,
+                         since: int = None) -> Iterator:
+    """
+    Page through the league's full transaction feed (newest first) as a generator.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        page_size (int, optional): Number of activities to request per call. Defaults to 25.
+        msg_type (str, optional): Filter passed to espn_api (e.g. 'TRADED'). Defaults to None (all).
+        since (int, optional): Epoch ms; stop once an activity at or before this date is reached.
+
+    Yields:
+        Activity: espn_api Activity objects newer than `since`
+    """
+    offset = 0
+    while True:
+        page = league.recent_activity(size=page_size, msg_type=msg_type, offset=offset)
+        for activity in page:
+            if since is not None and activity.date <= since:
+                return
+            yield activity
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+def activity_to_records(activity) -> list:
+    """Flatten an espn_api Activity into one JSON-serializable record per action."""
+    records = []
+    for action in activity.actions:
+        team, action_type, player = action[0], action[1], action[2]
+        records.append({'date': activity.date,
+                        'team_id': team.team_id,
+                        'team_name': team.team_name,
+                        'team_owner': getattr(team, 'owner', None),
+                        'action': action_type,
+                        'player_id': getattr(player, 'playerId', None),
+                        'player_name': getattr(player, 'name', str(player)),
+                        'position': getattr(player, 'position', None),
+                        'bid_amount': action[3] if len(action) > 3 else None})
+    return records
+
+def get_last_seen_date(path: str):
+    """Return the newest activity date (epoch ms) in the log, or None if there is no log yet."""
+    if not os.path.exists(path):
+        return None
+    last_seen = None
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                date = json.loads(line)['date']
+                last_seen = date if last_seen is None else max(last_seen, date)
+    return last_seen
+
+def update_activity_log(league: League, path: str = None, page_size: int = 25) -> int:
+    """
+    Fetch only the activities newer than the last one in the local log and append them.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        path (str, optional): Log path. Defaults to get_activity_log_path(league).
+        page_size (int, optional): Number of activities to request per call. Defaults to 25.
+
+    Returns:
+        int: Number of new activities appended
+    """
+    path = path or get_activity_log_path(league)
+    new_activities = list(iter_league_activity(league, page_size=page_size,
+                                               since=get_last_seen_date(path)))
+    if len(new_activities) == 0:
+        return 0
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as f:
+        ## Feed is newest first; append oldest first so the log stays ordered by date
+        for activity in sorted(new_activities, key=lambda x: x.date):
+            for record in activity_to_records(activity):
+                f.write(json.dumps(record) + '\n')
+    return len(new_activities)
+
+def load_activity_log_df(path: str) -> pd.DataFrame:
+    """
+    Read the local activity log into a DataFrame (one row per action).
+
+    Args:
+        path (str): Log path
+
+    Returns:
+        pd.DataFrame: Activity log with columns LOG_COLUMNS
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame(columns = LOG_COLUMNS)
+    return pd.read_json(path, lines = True, dtype = {'date': 'int64'})
+
+def get_transaction_counts_df(activity_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Count trades, waiver claims and acquisitions (FA + waiver adds) per team from the activity log.
+
+    Args:
+        activity_df (pd.DataFrame): DataFrame from load_activity_log_df
+
+    Returns:
+        pd.DataFrame: One row per team with 'trades', 'waivers' and 'acquisitions' columns
+    """
+    counts_df = activity_df[['team_id', 'team_name', 'team_owner']].drop_duplicates('team_id').set_index('team_id')
+
+    ## A trade is one activity (date) per team involved, regardless of how many players moved
+    trades = activity_df[activity_df['action'] == 'TRADED'].drop_duplicates(['date', 'team_id'])
+    counts_df['trades'] = trades.groupby('team_id').size()
+    counts_df['waivers'] = activity_df[activity_df['action'] == 'WAIVER ADDED'].groupby('team_id').size()
+    counts_df['acquisitions'] = (activity_df[activity_df['action'].isin(['FA ADDED', 'WAIVER ADDED'])]
+                                 .groupby('team_id').size())
+    counts_df[['trades', 'waivers', 'acquisitions']] = counts_df[['trades', 'waivers', 'acquisitions']].fillna(0).astype(int)
+    return counts_df.reset_index()
@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+import head_to_head as h2h
+import league_benchmarks as lb
+import name_formatting as nf
+import activity_log as al
+import projections as pj
+
+## Headline facts posted with each chart. Every caption is a few lookups on datasets the pipeline
+### already built for the charts (no API calls, no re-solving lineups or re-simulating), so they
+### run inline while posting.
+
+def best_steal_caption(draft_df: pd.DataFrame, steals_after_rd: int = 1) -> str:
+    """The pick furthest above expected, after the first `steals_after_rd` rounds."""
+    above_pred = draft_df['points_above_pred'].to_numpy()
+    eligible = np.flatnonzero(draft_df['round_num'].to_numpy() > steals_after_rd)
+    if len(eligible) == 0:
+        return ''
+    i = eligible[np.argmax(above_pred[eligible])]
+    pick = draft_df.iloc[i]
+    return (f"Best steal: {pick['player_name']} (round {pick['round_num']}, {pick['team_owner']}), "
+            f"{above_pred[i]:.1f} points above expected.")
+
+def biggest_bust_caption(draft_df: pd.DataFrame, busts_lte_rd: int = 4) -> str:
+    """The pick furthest below expected in the first `busts_lte_rd` rounds."""
+    above_pred = draft_df['points_above_pred'].to_numpy()
+    eligible = np.flatnonzero(draft_df['round_num'].to_numpy() <= busts_lte_rd)
+    if len(eligible) == 0:
+        return ''
+    i = eligible[np.argmin(above_pred[eligible])]
+    pick = draft_df.iloc[i]
+    return (f"Biggest bust: {pick['player_name']} (round {pick['round_num']}, {pick['team_owner']}), "
+            f"{-above_pred[i]:.1f} points below expected.")
+
+def top_scorer_caption(weekly_scores_df: pd.DataFrame, week: int, sketches: lb.QuantileSketches = None) -> str:
+    """The week's highest scoring team, and where the score ranks among every week of all our leagues."""
+    week_df = weekly_scores_df[weekly_scores_df['week'] == week]
+    if len(week_df) == 0:
+        return ''
+    top = week_df.loc[week_df['score'].idxmax()]
+    caption = f"Top score of week {week}: {top['team']} with {top['score']:.1f}"
+    if sketches is not None and sketches.n > 0:
+        pct = sketches.percentile('score', top['score'])
+        caption += f" ({lb.describe_percentile(pct)} of {sketches.n:,} team-weeks across all our leagues)"
+    return caption + '.'
+
+def luckiest_team_caption(weekly_scores_df: pd.DataFrame) -> str:
+    """The team whose actual record most outruns its record against the whole league (as in the luckiest records chart)."""
+    records = weekly_scores_df.groupby('team').agg(wins = ('win_flg', 'sum'), games = ('win_flg', 'size'),
+                                                   wins_in_week = ('wins_in_week', 'sum'),
+                                                   losses_in_week = ('losses_in_week', 'sum'))
+    win_pct_over_expected = (records['wins']/records['games'] -
+                             records['wins_in_week']/(records['wins_in_week'] + records['losses_in_week']))
+    team = win_pct_over_expected.idxmax()
+    r = records.loc[team]
+    return (f"Luckiest team: {team}, {r['wins']:g}-{r['games'] - r['wins']:g} despite going "
+            f"{r['wins_in_week']:g}-{r['losses_in_week']:g} against the whole league.")
+
+def bench_blunder_caption(full_sub_df: pd.DataFrame, week: int) -> str:
+    """The single costliest start/sit decision of the week."""
+    week_df = full_sub_df[full_sub_df['week'] == week]
+    if len(week_df) == 0:
+        return f"Nobody left points on the bench in week {week}."
+    worst = week_df.loc[week_df['potential_extra_points'].idxmax()]
+    owner = nf.first_names(pd.Series([worst['team_owner']]))[0]
+    return (f"Bench blunder of week {week}: {owner} started {worst['sub_for_player_name']} "
+            f"({worst['sub_for_player_points']:.1f}) over {worst['player_name']} ({worst['points']:.1f}).")
+
+def most_points_on_bench_caption(sub_totals_df: pd.DataFrame) -> str:
+    """The benched player who'd have added the most points this season."""
+    if len(sub_totals_df) == 0:
+        return ''
+    top = sub_totals_df.loc[sub_totals_df['potential_extra_points'].idxmax()]
+    weeks = f"{top['n_subs']:g} week" + ('' if top['n_subs'] == 1 else 's')
+    return (f"{top['team_owner']} left {top['potential_extra_points']:.1f} points on the bench with "
+            f"{top['player_name']} ({weeks}).")
+
+def playoff_odds_caption(playoff_odds_df: pd.DataFrame) -> str:
+    """The favorite, and the team closest to a coin flip for the playoffs."""
+    favorite = playoff_odds_df.loc[playoff_odds_df['playoff_pct'].idxmax()]
+    bubble = playoff_odds_df.loc[(playoff_odds_df['playoff_pct'] - 0.5).abs().idxmin()]
+    return (f"Favorite: {favorite['team']} ({favorite['playoff_pct']:.0%} to make the playoffs). "
+            f"On the bubble: {bubble['team']} ({bubble['playoff_pct']:.0%}).")
+
+def power_rankings_caption(ratings_df: pd.DataFrame, week: int) -> str:
+    """Who's #1 and who climbed the most this week."""
+    current = ratings_df[ratings_df['week'] == week].set_index('team')
+    if len(current) == 0:
+        return ''
+    previous = ratings_df[ratings_df['week'] == week - 1].set_index('team')
+    caption = f"#1 after week {week}: {current['rank'].idxmin()}."
+    rank_change = (previous['rank'] - current['rank']).dropna()
+    if len(rank_change) > 0 and rank_change.max() > 0:
+        caption += f" Biggest climber: {rank_change.idxmax()} (up {rank_change.max():g})."
+    return caption
+
+def perfect_manager_caption(standings_df: pd.DataFrame) -> str:
+    """The team that's cost itself the most wins by not starting its best lineup."""
+    lost_wins = standings_df['team_optimal_wins'] - standings_df['actual_wins']
+    i = lost_wins.idxmax()
+    if lost_wins[i] <= 0:
+        return ''
+    return f"{standings_df.loc[i, 'team']} would have {lost_wins[i]:g} more wins with perfect lineups."
+
+def wire_caption(wire_gains_df: pd.DataFrame) -> str:
+    """The owner who's left the most points on the waiver wire."""
+    by_owner = wire_gains_df.groupby('team_owner')['wire_gain'].sum()
+    if len(by_owner) == 0:
+        return ''
+    return f"Most points left on the wire: {by_owner.idxmax()} ({by_owner.max():.1f})."
+
+def beat_projections_caption(projection_errors_df: pd.DataFrame) -> str:
+    """The team whose starters have beaten their projections by the most."""
+    by_team = pj.summarize_projection_errors(projection_errors_df, 'team_owner')
+    if len(by_team) == 0:
+        return ''
+    top = by_team.iloc[0]
+    return f"{top['team_owner']}'s starters are {top['total_over_projection']:+.1f} points vs. ESPN's projections."
+
+def rivalry_week_caption(h2h_index: h2h.HeadToHeadIndex, season: int, week: int) -> str:
+    """The all-time series of the week's most played matchup."""
+    pairs = h2h.get_week_pairs(h2h_index, season, week)
+    if len(pairs) == 0:
+        return ''
+    team_a, team_b = max(pairs, key = lambda pair: h2h_index.record(*pair)['games'])
+    return h2h.rivalry_caption(h2h_index, team_a, team_b)
+
+def transactions_caption(activity_df: pd.DataFrame, acquisition_type: str) -> str:
+    """The owner with the most trades/acquisitions."""
+    counts = al.get_transaction_counts_df(activity_df)
+    if len(counts) == 0 or counts[acquisition_type].max() == 0:
+        return ''
+    top = counts.loc[counts[acquisition_type].idxmax()]
+    return f"Most {acquisition_type}: {top['team_owner']} ({top[acquisition_type]})."
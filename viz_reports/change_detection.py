@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+from typing import List
+
+def diff_rows(old_df: pd.DataFrame, new_df: pd.DataFrame, keys: List[str], columns: List[str]) -> pd.DataFrame:
+    """
+    Row-level diff of two versions of a dataset.
+
+    Args:
+        old_df (pd.DataFrame): Previously stored version
+        new_df (pd.DataFrame): Newly built version
+        keys (List[str]): Columns identifying a row (e.g. week, team_name, player_id)
+        columns (List[str]): Columns compared for rows present in both
+
+    Returns:
+        pd.DataFrame: The keys of every row that was 'added', 'removed' or 'changed' (in the 'change' column)
+    """
+    merged = old_df[keys + columns].merge(new_df[keys + columns], on = keys, how = 'outer',
+                                          suffixes = ('_old', '_new'), indicator = True)
+    changed = np.zeros(len(merged), dtype = bool)
+    for col in columns:
+        old, new = merged[f'{col}_old'], merged[f'{col}_new']
+        changed |= (old != new) & ~(old.isna() & new.isna())
+    change = np.select([merged['_merge'] == 'left_only', merged['_merge'] == 'right_only', changed],
+                       ['removed', 'added', 'changed'], default = '')
+    diff_df = merged[keys].assign(change = change)
+    return diff_df[diff_df['change'] != ''].reset_index(drop = True)
+
+def values_equal(old, new) -> bool:
+    """
+    Whether a rebuilt dataset without row keys is identical to the stored one (False if it can't tell).
+
+    Other objects are compared with ==, so dataset classes (e.g. HeadToHeadIndex) define __eq__ by value.
+    DataFrames holding Python objects without __eq__ (espn_api Players) never match after a pickle round trip,
+    give those datasets diff_keys/diff_columns instead.
+    """
+    if type(old) is not type(new):
+        return False
+    if isinstance(old, (pd.DataFrame, pd.Series)):
+        return old.equals(new)
+    if isinstance(old, np.ndarray):
+        return old.shape == new.shape and bool(np.array_equal(old, new))
+    if isinstance(old, (tuple, list)):
+        return len(old) == len(new) and all(values_equal(a, b) for a, b in zip(old, new))
+    try:
+        return bool(old == new)
+    except (TypeError, ValueError):
+        return False
+
+def get_changed_groups(diff_df: pd.DataFrame, by: List[str]) -> pd.DataFrame:
+    """Unique groups (e.g. team/week) touched by a diff from diff_rows."""
+    return diff_df[by].drop_duplicates().reset_index(drop = True)
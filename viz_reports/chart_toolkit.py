@@ -0,0 +1,133 @@
+import os
+import threading
+import numpy as np
+import matplotlib
+import matplotlib.style
+import seaborn as sns
+from contextlib import contextmanager
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+## rcParams for each chart style, resolved once at import instead of on every chart
+### (plt.style.use/sns.set re-apply the whole style globally, so it leaked into whatever chart came next).
+STYLES = {
+    'bars': dict(matplotlib.style.library['fivethirtyeight']),
+    'darkgrid': dict(sns.axes_style('darkgrid')),
+    'heatmap': {**sns.axes_style('darkgrid'), **sns.plotting_context('notebook', font_scale=1.1)},
+}
+DPI = 300
+PAD_INCHES = 0.1
+
+## Figures are reused per (style, figsize) and cleared after each save. They're Agg figures that
+### pyplot doesn't track, so nothing is left open between charts and no plt.close is needed.
+_templates = {}
+_templates_lock = threading.Lock()
+
+def _get_template(style: str, figsize: tuple) -> Figure:
+    key = (style, figsize)
+    with _templates_lock:
+        if key not in _templates:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)
+            _templates[key] = fig
+        return _templates[key]
+
+def get_export_path(path: str, fmt: str) -> str:
+    """Path of a chart's export in another format, e.g. data/plots/x-week-3.png -> data/plots/x-week-3.svg"""
+    return os.path.splitext(path)[0] + '.' + fmt
+
+@contextmanager
+def chart(path: str, style: str = 'bars', figsize: tuple = None, nrows: int = 1, ncols: int = 1,
+          formats: tuple = ('png',), **subplot_kw):
+    """
+    Styled figure/axes for one chart, saved to `path` on exit (and next to it in each of `formats`).
+
+    The figure is laid out once and each format is written from it with the same tight bounding box,
+    rather than building the chart (and working out the bounding box) again per format.
+
+    Charts are drawn on one thread at a time (the pipeline's render thread, the report server's render lock),
+    so each template figure is only ever in use by one chart.
+
+    Args:
+        path (str): Where the chart is saved
+        style (str, optional): Key of STYLES. Defaults to 'bars'.
+        figsize (tuple, optional): Figure size in inches. Defaults to the style's figure.figsize.
+        nrows (int, optional): Rows of axes. Defaults to 1.
+        ncols (int, optional): Columns of axes. Defaults to 1.
+        formats (tuple, optional): Formats to write, e.g. ('png', 'svg'). PNG (what gets posted to chat) is
+            always written first. Defaults to ('png',).
+        **subplot_kw: Passed to Figure.subplots (e.g. sharex, sharey)
+
+    Yields:
+        tuple: (Figure, Axes or array of Axes)
+    """
+    rc = STYLES[style]
+    figsize = tuple(figsize or rc.get('figure.figsize', matplotlib.rcParamsDefault['figure.figsize']))
+    with matplotlib.rc_context(rc):
+        fig = _get_template(style, figsize)
+        try:
+            axes = fig.subplots(nrows, ncols, squeeze=True, **subplot_kw)
+            yield fig, axes
+            fig.draw_without_rendering()
+            bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(PAD_INCHES)
+            for fmt in ['png'] + [fmt for fmt in formats if fmt != 'png']:
+                fig.savefig(get_export_path(path, fmt), dpi=DPI, bbox_inches=bbox)
+        finally:
+            fig.clear()
+
+def barh(ax, labels, values, color, title: str = None, xlabel: str = '', title_size: float = None,
+         label_size: float = None, left=None):
+    """
+    Horizontal bar chart of values by label, first label at the bottom (like DataFrame.plot(kind='barh')).
+
+    Args:
+        ax (Axes): Axes from chart()
+        labels (list-like): Bar labels
+        values (list-like): Bar lengths
+        color (str or list): Bar color, or one color per bar (None = the style's first color)
+        title (str, optional): Axes title. Defaults to None.
+        xlabel (str, optional): x axis label. Defaults to ''.
+        title_size (float, optional): Title font size. Defaults to the style's.
+        label_size (float, optional): Bar label font size. Defaults to the style's.
+        left (list-like, optional): Bar starts, for stacking. Defaults to None.
+
+    Returns:
+        BarContainer: The bars
+    """
+    y = np.arange(len(labels))
+    bars = ax.barh(y, values, color = color, left = left, height = 0.5)
+    ax.set_yticks(y, [str(label) for label in labels])
+    if title is not None:
+        ax.set_title(title, fontsize = title_size)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('')
+    if label_size is not None:
+        ax.tick_params(axis = 'y', labelsize = label_size)
+    return bars
+
+def heatmap(ax, heatmap_df, labels_df, cmap: str, title: str = None, xlabel: str = None,
+            annot_size: float = 8.5, **heatmap_kw):
+    """
+    Annotated heatmap (seaborn) with the repo's usual formatting.
+
+    Args:
+        ax (Axes): Axes from chart(style='heatmap')
+        heatmap_df (pd.DataFrame): Values to color by
+        labels_df (pd.DataFrame): Text for each cell
+        cmap (str): Color scale
+        title (str, optional): Axes title. Defaults to None.
+        xlabel (str, optional): x axis label. Defaults to seaborn's (the column name).
+        annot_size (float, optional): Cell text font size. Defaults to 8.5.
+        **heatmap_kw: Passed to sns.heatmap (e.g. cbar, vmin, vmax)
+
+    Returns:
+        Axes: The heatmap axes
+    """
+    ax = sns.heatmap(heatmap_df, annot = labels_df, cmap = cmap, fmt = '', ax = ax,
+                     annot_kws = {"fontsize": annot_size}, **heatmap_kw)
+    if title is not None:
+        ax.set_title(title)
+    if xlabel is not None:
+        ax.set_xlabel(xlabel)
+    ax.set_ylabel('')
+    return ax
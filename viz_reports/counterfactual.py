@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from espn_api.football import League
+
+import data_utils as du
+import simulation as sim
+
+SCENARIOS = {'actual': ('actual_score', 'actual_score'),
+             'team_optimal': ('optimal_score', 'actual_score'),
+             'opponent_optimal': ('actual_score', 'optimal_score'),
+             'both_optimal': ('optimal_score', 'optimal_score')}
+SCENARIO_LABELS = {'actual': 'Actual', 'team_optimal': 'Only Team Optimal',
+                   'opponent_optimal': 'Only Opponent Optimal', 'both_optimal': 'Both Optimal'}
+
+def get_counterfactual_results_df(optimal_scores_df: pd.DataFrame, opponents: np.ndarray,
+                                  team_names: list) -> pd.DataFrame:
+    """
+    Replay every matchup under each lineup scenario in SCENARIOS (actual, only one side optimal, both optimal).
+
+    Args:
+        optimal_scores_df (pd.DataFrame): DataFrame from data_utils.get_optimal_scores_df
+        opponents (np.ndarray): (weeks x teams) opponent indexes for weeks 1..N, from simulation.get_schedule_matrix
+        team_names (list): Team names in the same order as `opponents`
+
+    Returns:
+        pd.DataFrame: One row per team/week with a '<scenario>_win' column (1 win, 0.5 tie, 0 loss) per scenario
+    """
+    n_weeks = opponents.shape[0]
+    ## (weeks x teams) arrays of both scores, then the opponent's via the schedule in one gather
+    scores = {col: (optimal_scores_df.pivot(index='week', columns='team_name', values=col)
+                    .sort_index().loc[1:n_weeks, team_names].to_numpy())
+              for col in ['actual_score', 'optimal_score']}
+
+    results_df = pd.DataFrame({'week': np.repeat(np.arange(1, n_weeks+1), len(team_names)),
+                               'team': np.tile(team_names, n_weeks),
+                               'opponent': np.array(team_names)[opponents.ravel()]})
+    for scenario, (team_col, opp_col) in SCENARIOS.items():
+        own = scores[team_col]
+        opp = np.take_along_axis(scores[opp_col], opponents, axis=1)
+        results_df[f'{scenario}_win'] = ((own > opp) + 0.5*(own == opp)).ravel()
+        results_df[f'{scenario}_score'] = own.ravel()
+    return results_df
+
+def get_counterfactual_standings_df(results_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Wins/losses for every team under each scenario.
+
+    Args:
+        results_df (pd.DataFrame): DataFrame from get_counterfactual_results_df
+
+    Returns:
+        pd.DataFrame: One row per team with '<scenario>_wins' and '<scenario>_losses' columns
+    """
+    n_weeks = results_df.groupby('team').size()
+    standings_df = results_df.groupby('team')[[f'{s}_win' for s in SCENARIOS]].sum()
+    standings_df.columns = [f'{s}_wins' for s in SCENARIOS]
+    for scenario in SCENARIOS:
+        standings_df[f'{scenario}_losses'] = n_weeks - standings_df[f'{scenario}_wins']
+    return standings_df.sort_values('both_optimal_wins', ascending=False).reset_index()
+
+def get_league_counterfactual_standings_df(league: League, lineup_df: pd.DataFrame, starter_counts: dict,
+                                           week: int) -> tuple:
+    """
+    Counterfactual "perfect manager" results and standings for the league through `week`.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
+        starter_counts (dict): From data_utils.get_starter_counts
+        week (int): Week number
+
+    Returns:
+        tuple: (results_df, standings_df)
+    """
+    team_names = [team.team_name for team in league.teams]
+    optimal_scores_df = du.get_optimal_scores_df(lineup_df[lineup_df['week'] <= week], starter_counts)
+    opponents = sim.get_schedule_matrix(league, team_names, 1, week)
+    results_df = get_counterfactual_results_df(optimal_scores_df, opponents, team_names)
+    return results_df, get_counterfactual_standings_df(results_df)
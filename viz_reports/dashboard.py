@@ -0,0 +1,62 @@
+import os
+import html
+import base64
+
+import chart_toolkit as tk
+
+DASHBOARD_CSS = """
+body { font-family: Helvetica, Arial, sans-serif; background: #f0f0f0; margin: 24px; }
+h1 { margin-bottom: 4px; }
+.grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(560px, 1fr)); gap: 16px; }
+.card { background: white; border-radius: 6px; padding: 12px; }
+.card svg, .card img { width: 100%; height: auto; }
+table { border-collapse: collapse; width: 100%; font-size: 14px; }
+th, td { padding: 4px 8px; border-bottom: 1px solid #ddd; text-align: left; }
+"""
+
+def get_dashboard_path(week: int) -> str:
+    return f'data/plots/dashboard-week-{week}.html'
+
+def _embed_chart(png_path: str) -> str:
+    """The chart's SVG export inline if there is one (small, sharp at any size), else the PNG as a data URI."""
+    svg_path = tk.get_export_path(png_path, 'svg')
+    if os.path.exists(svg_path):
+        with open(svg_path) as f:
+            svg = f.read()
+        ## Drop the XML prolog/doctype, they aren't allowed inside an HTML body
+        return svg[svg.index('<svg'):]
+    with open(png_path, 'rb') as f:
+        encoded = base64.b64encode(f.read()).decode()
+    return f'<img src="data:image/png;base64,{encoded}">'
+
+def _title(report_name: str) -> str:
+    return html.escape(report_name.replace('_', ' ').title())
+
+def write_dashboard(week: int, chart_paths: dict, tables: dict = None, path: str = None,
+                    captions: dict = None) -> str:
+    """
+    Write a single self-contained HTML page with the week's charts and tables (no external files).
+
+    Args:
+        week (int): Week number
+        chart_paths (dict): Report name to PNG path, in display order (SVG exports are used when they exist)
+        tables (dict, optional): Table title to DataFrame. Defaults to None.
+        path (str, optional): Output path. Defaults to get_dashboard_path(week).
+        captions (dict, optional): Report name to caption, shown under the chart. Defaults to None.
+
+    Returns:
+        str: Path to the dashboard
+    """
+    path = path or get_dashboard_path(week)
+    cards = [f'<div class="card"><h3>{html.escape(title)}</h3>{df.to_html(index = False, border = 0)}</div>'
+             for title, df in (tables or {}).items()]
+    captions = captions or {}
+    cards += [f'<div class="card"><h3>{_title(name)}</h3>{_embed_chart(png_path)}'
+              f'<p>{html.escape(captions.get(name, ""))}</p></div>'
+              for name, png_path in chart_paths.items()]
+    page = (f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Week {week} Reports</title>'
+            f'<style>{DASHBOARD_CSS}</style></head>\n<body><h1>Week {week} Reports</h1>\n'
+            f'<div class="grid">\n' + '\n'.join(cards) + '\n</div></body></html>\n')
+    with open(path, 'w') as f:
+        f.write(page)
+    return path
@@ -1,12 +1,17 @@
 import numpy as np
 import pandas as pd
 from espn_api.football import League, Player, Team
-from typing import List
+from typing import List, Iterable, Iterator
+from sklearn.linear_model import LinearRegression
 
+import os
+import json
 import datetime
-import requests
 import re
 from data.configs import keys
+import activity_log as al
+import transport as tr
+import resilient_fetch as rf
 
 # https://github.com/cwendt94/espn-api/pull/487#issuecomment-1782273387
 def set_league_endpoint(league: League) -> None:
@@ -209,6 +214,126 @@ def optimal_lineup_score(lineup, starter_counts):
 
     return (best_score, score, best_score - score, score_pct)
 
+def get_lineup_slots(starter_counts: dict) -> tuple:
+    """
+    Split starter counts into single-position slots and flexes, in the order lineups are filled.
+
+    Args:
+        starter_counts (dict): A dictionary containing the number of starters for each position
+
+    Returns:
+        tuple: (position -> number of single-position starters, [(eligible positions, number of flex starters)])
+    """
+    single_counts = {pos: n for pos, n in starter_counts.items()
+                     if (pos == 'D/ST' or '/' not in pos) and pos not in ['OP', 'DP']}
+    flexes = [(pos.split('/'), n) for pos, n in starter_counts.items() if 'D/ST' not in pos and '/' in pos]
+    if 'OP' in starter_counts:
+        flexes.append((['RB', 'WR', 'TE', 'QB'], starter_counts['OP']))
+    if 'DP' in starter_counts:
+        flexes.append((['DT', 'DE', 'LB', 'CB', 'S'], starter_counts['DP']))
+    return single_counts, flexes
+
+def get_optimal_scores_df(lineup_df: pd.DataFrame, starter_counts: dict) -> pd.DataFrame:
+    """
+    Batch version of optimal_lineup_score: the best possible and actual score for every
+    team/week in lineup_df at once, using the same greedy fill (single positions first,
+    then flexes, then OP/DP) with grouped ranks instead of per-player dicts.
+
+    Args:
+        lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
+        starter_counts (dict): A dictionary containing the number of starters for each position
+
+    Returns:
+        pd.DataFrame: One row per team/week with 'optimal_score', 'actual_score' and 'score_pct'
+    """
+    keys = ['team_name', 'week']
+    df = lineup_df[keys + ['position', 'slot_position', 'points']].copy()
+    df['selected'] = False
+    single_counts, flexes = get_lineup_slots(starter_counts)
+
+    ## Single positions: top N at each position
+    df['pos_rank'] = df.groupby(keys + ['position'])['points'].rank(method='first', ascending=False)
+    df['selected'] = df['pos_rank'] <= df['position'].map(single_counts).fillna(0)
+
+    ## Then each flex from whoever is left
+    for flex_positions, n in flexes:
+        eligible = df[~df['selected'] & df['position'].isin(flex_positions)]
+        flex_rank = eligible.groupby(keys)['points'].rank(method='first', ascending=False)
+        df.loc[flex_rank[flex_rank <= n].index, 'selected'] = True
+
+    df['optimal_points'] = df['points'].where(df['selected'], 0)
+    df['actual_points'] = df['points'].where(~df['slot_position'].isin(['BE', 'IR']), 0)
+    scores_df = (df.groupby(keys).agg(optimal_score=('optimal_points', 'sum'), actual_score=('actual_points', 'sum'))
+                 .reset_index())
+    scores_df['score_pct'] = np.where(scores_df['optimal_score'] != 0,
+                                      scores_df['actual_score']/scores_df['optimal_score'].replace(0, np.nan)*100, 0)
+    return scores_df
+
+OWNER_CACHE_DIR = 'data/cache'
+OWNER_CACHE_TTL = datetime.timedelta(days=1)
+
+_owner_directories = {}
+
+def get_owner_directory(league: League, ttl: datetime.timedelta = OWNER_CACHE_TTL, force: bool = False) -> dict:
+    """Get the map from SWID to owner name for the league, using a cache shared by every
+    report/league in the process and persisted under data/cache between runs.
+
+    The mTeam view is only requested once the cached copy is older than `ttl`, and then
+    conditionally (ETag/Last-Modified) so an unchanged directory costs a 304 instead of a download.
+
+    Args:
+        league (League): ESPN League object
+        ttl (datetime.timedelta, optional): Max age before revalidating. Defaults to OWNER_CACHE_TTL.
+        force (bool, optional): Download the directory unconditionally, e.g. when the cached copy is
+            known to be missing an owner (a 304 would just hand back the same stale copy). Defaults to False.
+
+    Returns:
+        dict: SWID to owner name
+    """
+    key = (league.league_id, league.year)
+    cache_path = os.path.join(OWNER_CACHE_DIR, f'owners-{league.league_id}-{league.year}.json')
+    cached = _owner_directories.get(key)
+    if cached is None and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cached = json.load(f)
+
+    now = datetime.datetime.now().timestamp()
+    if not force and cached is not None and now - cached['fetched_at'] < ttl.total_seconds():
+        _owner_directories[key] = cached
+        return cached['swid_to_name']
+
+    headers = {}
+    if not force and cached is not None:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    r = tr.get_transport().get("{}view=mTeam".format(league.endpoint), cookies=league.cookies,
+                               headers=headers)
+
+    if r.status_code == 304 and cached is not None and not force:
+        cached['fetched_at'] = now
+    else:
+        r.raise_for_status()
+        data = r.json()
+        if type(data) == list:
+            data = data[0]
+
+        # For each member in the data, create a map from SWID to their full name
+        swid_to_name = {}
+        for member in data["members"]:
+            swid_to_name[member["id"]] = re.sub(
+                " +", " ", member["firstName"] + " " + member["lastName"]
+            ).title()
+        cached = {'fetched_at': now, 'etag': r.headers.get('ETag'),
+                  'last_modified': r.headers.get('Last-Modified'), 'swid_to_name': swid_to_name}
+
+    os.makedirs(OWNER_CACHE_DIR, exist_ok=True)
+    with open(cache_path, 'w') as f:
+        json.dump(cached, f)
+    _owner_directories[key] = cached
+    return cached['swid_to_name']
+
 def set_owner_names(league: League):
     """This function sets the owner names for each team in the league.
     The team.owners attribute only contains the SWIDs of each owner, not their real name.
@@ -216,17 +341,10 @@ def set_owner_names(league: League):
     Args:
         league (League): ESPN League object
     """
-    endpoint = "{}view=mTeam".format(league.endpoint)
-    r = requests.get(endpoint, cookies=league.cookies).json()
-    if type(r) == list:
-        r = r[0]
-
-    # For each member in the data, create a map from SWID to their full name
-    swid_to_name = {}
-    for member in r["members"]:
-        swid_to_name[member["id"]] = re.sub(
-            " +", " ", member["firstName"] + " " + member["lastName"]
-        ).title()
+    swid_to_name = get_owner_directory(league)
+    if any(team.owners[0] not in swid_to_name for team in league.teams):
+        ## New owner since the cache was written
+        swid_to_name = get_owner_directory(league, force=True)
 
     # Set the owner name for each team
     for team in league.teams:
@@ -242,27 +360,45 @@ def get_player_obj(league: League, player_id: int, player_name: str) -> Player:
         player_name (str): Name of player
 
     Returns:
-        Player: espn_api Player object
+        Player: espn_api Player object, or None if ESPN has no such player.
+            Request errors are raised (so they can be retried), not treated as a missing player.
     """
-    try:
-        player = league.player_info(playerId = player_id)
-    except:
-        try:
-            player = league.player_info(name = player_name, playerId = player_id)
-        except:
-            return None
-    
+    player = league.player_info(playerId = player_id)
+    if player is None:
+        ## Fall back to looking the player up by name
+        player = league.player_info(name = player_name, playerId = player_id)
     return player
 
-def get_draft_df(league: League) -> pd.DataFrame:
+def get_player_objs(league: League, player_ids: list, player_names: list, checkpoint_path: str = None) -> tuple:
+    """
+    get_player_obj for many players, each with its own retries, resuming from a checkpoint of earlier attempts.
+
+    Args:
+        league (League): League object from espn_api
+        player_ids (list): ESPN IDs of the players
+        player_names (list): Names of the players, same order
+        checkpoint_path (str, optional): Fetch checkpoint (see resilient_fetch.fetch_all). Defaults to None.
+
+    Returns:
+        tuple: (player id -> Player or None, player id -> error for players that couldn't be fetched)
+    """
+    names = dict(zip(player_ids, player_names))
+    return rf.fetch_all(names, lambda player_id: get_player_obj(league, player_id, names[player_id]),
+                        checkpoint_path = checkpoint_path)
+
+def get_draft_df(league: League, checkpoint_path: str = None) -> pd.DataFrame:
     """
     Get a DataFrame of each draft pick and the 
 
+    Picks whose player couldn't be fetched are left out and the DataFrame is flagged as incomplete
+    (resilient_fetch.get_incomplete), a rerun with the same checkpoint only fetches those players.
+
     Args:
         league (League): ESPN fantasy league obj/connection
+        checkpoint_path (str, optional): Fetch checkpoint for the player lookups. Defaults to None.
 
     Returns:
-        pd.DataFrame: DataFrame of draft results and avg. pts above/below avg for position
+        pd.DataFrame: DataFrame of draft results with each player's season 'points' and 'position'
     """
     ## Using the API to get the draft
     player_ids = []
@@ -285,18 +421,126 @@ def get_draft_df(league: League) -> pd.DataFrame:
     draft_df['team_owner'] = draft_df['team'].apply(lambda x: x.owner)
     draft_df['team_name'] = draft_df['team'].apply(lambda x: x.team_name)
 
-    draft_df['Player_obj'] = draft_df.apply(lambda x: get_player_obj(league, x['player_id'], x['player_name']), axis = 1)
-    draft_df['points'] = draft_df['Player_obj'].apply(lambda x: x.stats[0]['points'])
+    players, failed = get_player_objs(league, list(draft_df['player_id']), list(draft_df['player_name']), checkpoint_path)
+    draft_df['Player_obj'] = draft_df['player_id'].map(players)
+    ## Not fetched, or not known to ESPN
+    draft_df = draft_df[draft_df['Player_obj'].notna()].copy()
+    draft_df['points'] = draft_df['Player_obj'].apply(lambda x: x.stats.get(0, {}).get('points', 0))
     draft_df['position'] = draft_df['Player_obj'].apply(lambda x: x.position)
     #draft_df['espn_proj_pts_thru_week'] =  draft_df['Player_obj'].apply(lambda x: x.projected_total_points*(WEEK_NUMBER/17)) 
     ## ^ This doesn't work bc the player obj has the projected pts for the *rest* of the season, not as of the beginning
-    avg_pos_points = draft_df.groupby('position').agg({'points': np.mean}).sort_values('points', ascending = False).reset_index().rename(columns = {'points':'avg_pos_points'})
-
-    draft_df = draft_df.merge(avg_pos_points, on = 'position')
-    draft_df['points_above_avg'] = draft_df['points'] -  draft_df['avg_pos_points']
+    ## Value against the position's replacement level is added by get_draft_vor_df
+    draft_df = draft_df.reset_index(drop = True)
     draft_df['overall_pick'] = (draft_df['round_num']-1)*len(set(teams))+draft_df['round_pick']
+    if len(failed) > 0:
+        rf.mark_incomplete(draft_df, 'draft: ' + rf.describe_failures('players', failed))
     return draft_df
 
+def get_weekly_points_matrix(players: List[Player], week: int) -> np.ndarray:
+    """
+    Build a dense (players x weeks) array of points scored each week from the
+    per-week `stats` dict already on each espn_api Player object (no extra API calls).
+
+    Args:
+        players (List[Player]): espn_api Player objects
+        week (int): Last week number to include
+
+    Returns:
+        np.ndarray: Array of shape (len(players), week), column i is week i+1. Weeks
+                    with no stats (byes, injuries) are 0.
+    """
+    points = np.zeros((len(players), week))
+    for i, player in enumerate(players):
+        stats = player.stats if player is not None else {}
+        for wk in range(1, week+1):
+            if wk in stats:
+                points[i, wk-1] = stats[wk].get('points', 0)
+    return points
+
+def get_draft_vor_df(draft_df: pd.DataFrame, replacement) -> pd.DataFrame:
+    """
+    Add each drafted player's season points over replacement level, summed week by week, and how far
+    that is above/below expected for the pick (what the steals/busts charts and captions rank by).
+
+    Args:
+        draft_df (pd.DataFrame): DataFrame of draft results from get_draft_df
+        replacement (ReplacementLevels): Table from replacement_level.get_league_replacement_levels
+
+    Returns:
+        pd.DataFrame: Copy of draft_df with 'points_above_replacement' through the last week in the table
+                      and 'points_above_pred'
+    """
+    draft_df = draft_df.copy()
+    points = get_weekly_points_matrix(list(draft_df['Player_obj']), len(replacement.weeks))
+    draft_df['points_above_replacement'] = replacement.value_over_replacement(draft_df['position'], points).sum(axis = 1)
+
+    ## Very basic model to determine "expected points" based on draft position
+    picks = np.array(draft_df['overall_pick']).reshape(-1, 1)
+    reg = LinearRegression().fit(picks, draft_df['points_above_replacement'])
+    draft_df['points_above_pred'] = draft_df['points_above_replacement'] - reg.predict(picks)
+    return draft_df
+
+def get_draft_value_by_week(draft_df: pd.DataFrame, week: int, replacement) -> np.ndarray:
+    """
+    Cumulative points above expectation for each drafted player after every week.
+
+    Uses the same definition of "expected" as the steals/busts charts (points over
+    replacement level, regressed on overall pick), but applied to the cumulative
+    points through each week instead of only the current season total.
+
+    Args:
+        draft_df (pd.DataFrame): DataFrame of draft results from get_draft_df
+        week (int): Last week number to include
+        replacement (ReplacementLevels): Table from replacement_level.get_league_replacement_levels
+
+    Returns:
+        np.ndarray: Array of shape (len(draft_df), week), row order matches draft_df
+    """
+    points = get_weekly_points_matrix(list(draft_df['Player_obj']), week)
+    points_above_replacement = np.cumsum(replacement.value_over_replacement(draft_df['position'], points), axis = 1)
+
+    ## Closed-form least squares of points_above_replacement ~ overall_pick, one fit per week
+    x = draft_df['overall_pick'].to_numpy(dtype = float).reshape(-1, 1)
+    x_centered = x - x.mean()
+    y_centered = points_above_replacement - points_above_replacement.mean(axis = 0)
+    slopes = (x_centered * y_centered).sum(axis = 0) / (x_centered**2).sum()
+    preds = points_above_replacement.mean(axis = 0) + x_centered * slopes
+
+    return points_above_replacement - preds
+
+def get_draft_value_long_df(draft_df: pd.DataFrame, value_by_week: np.ndarray) -> pd.DataFrame:
+    """
+    Reshape the dense draft value array into a long DataFrame for plotting.
+
+    Args:
+        draft_df (pd.DataFrame): DataFrame of draft results from get_draft_df
+        value_by_week (np.ndarray): Array from get_draft_value_by_week
+
+    Returns:
+        pd.DataFrame: One row per player/week with 'points_above_pred'
+    """
+    n_players, n_weeks = value_by_week.shape
+    return pd.DataFrame({'player_name': np.repeat(draft_df['player_name'].to_numpy(), n_weeks),
+                         'team_owner': np.repeat(draft_df['team_owner'].to_numpy(), n_weeks),
+                         'overall_pick': np.repeat(draft_df['overall_pick'].to_numpy(), n_weeks),
+                         'round_num': np.repeat(draft_df['round_num'].to_numpy(), n_weeks),
+                         'week': np.tile(np.arange(1, n_weeks+1), n_players),
+                         'points_above_pred': value_by_week.ravel()})
+
+## Columns get_optimal_subs adds to the lineup rows of the players that should've started
+SUB_COLUMNS = ['sub_for_player_name', 'sub_for_player_id', 'sub_for_player_points', 'new_slot_position']
+
+def _get_flex_sub_player(subbed_player_candidate_df: pd.DataFrame, sub_dfs: list):
+    """
+    Starter to sub out when a bench player takes a slot and no one from its position was removed:
+    the flex starter, or if the flex starter is still in the optimal lineup (it just moves to its
+    position's slot), the lowest scorer it pushed out that isn't already subbed out.
+    """
+    already_subbed_out_ids = [sub_id for sub_df in sub_dfs for sub_id in sub_df['sub_for_player_id']]
+    not_yet_subbed = subbed_player_candidate_df[~subbed_player_candidate_df['player_id'].isin(already_subbed_out_ids)]
+    old_flex = not_yet_subbed[not_yet_subbed['slot_position'] == 'RB/WR/TE']
+    return (old_flex if len(old_flex) > 0 else not_yet_subbed).reset_index()['player'][0]
+
 def get_optimal_subs(lineup_df: pd.DataFrame) -> pd.DataFrame:
     """
     Super messy mega-function to find substitutions that should've been made.
@@ -385,9 +629,7 @@ def get_optimal_subs(lineup_df: pd.DataFrame) -> pd.DataFrame:
             sub_player = rb_removed_lineup_df['player'][0]
         else:
             ## Otherwise we must've taken a flex out to make room for another RB, so we'll use that one
-            sub_player = (subbed_player_candidate_df[
-                (subbed_player_candidate_df['slot_position'] == old_flex_position) & 
-                (~subbed_player_candidate_df['player_id'].isin(already_subbed_player_ids))].reset_index()['player'][0])
+            sub_player = _get_flex_sub_player(subbed_player_candidate_df, sub_dfs)
         top_rb1['sub_for_player_name'] = sub_player.name
         top_rb1['sub_for_player_id'] = sub_player.playerId
         top_rb1['sub_for_player_points'] = sub_player.points
@@ -508,9 +750,7 @@ def get_optimal_subs(lineup_df: pd.DataFrame) -> pd.DataFrame:
 
         else:
             # Otherwise we must've taken a flex out to make room for another TE, so we'll use that one
-            sub_player = (subbed_player_candidate_df[
-                (subbed_player_candidate_df['slot_position'] == old_flex_position) & 
-                (~subbed_player_candidate_df['player_id'].isin(already_subbed_player_ids))].reset_index()['player'][0])
+            sub_player = _get_flex_sub_player(subbed_player_candidate_df, sub_dfs)
             
         top_te['sub_for_player_name'] = sub_player.name
         top_te['sub_for_player_id'] = sub_player.playerId
@@ -594,6 +834,88 @@ def get_optimal_subs(lineup_df: pd.DataFrame) -> pd.DataFrame:
 
     return sub_df
 
+def get_full_sub_df(lineup_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Run get_optimal_subs for every team/week in the lineups.
+
+    Args:
+        lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
+
+    Returns:
+        pd.DataFrame: All substitutions that should have been made, with 'potential_extra_points'
+    """
+    ## One pass over the groups instead of filtering the whole frame for every team/week
+    sub_dfs = []
+    for _, sub_lineup_df in lineup_df.groupby(['team_name', 'week']):
+        sub_df = get_optimal_subs(sub_lineup_df)
+        if len(sub_df) > 0:
+            sub_dfs.append(sub_df)
+    if len(sub_dfs) > 0:
+        full_sub_df = pd.concat(sub_dfs).reset_index()
+    else:
+        ## Every team/week started its optimal lineup
+        full_sub_df = pd.DataFrame(columns = ['index'] + list(lineup_df.columns) + SUB_COLUMNS)
+    full_sub_df['potential_extra_points'] = full_sub_df['points'] - full_sub_df['sub_for_player_points']
+    return full_sub_df
+
+def get_sub_totals_df(full_sub_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Total potential extra points and number of subs for each owner/player.
+
+    Args:
+        full_sub_df (pd.DataFrame): DataFrame from get_full_sub_df
+
+    Returns:
+        pd.DataFrame: One row per 'team_owner'/'player_name' with 'potential_extra_points' and 'n_subs'
+    """
+    return (full_sub_df.groupby(['team_owner', 'player_name'])
+            .agg(potential_extra_points = ('potential_extra_points', 'sum'),
+                 n_subs = ('potential_extra_points', 'size'))
+            .reset_index())
+
+def get_sub_totals_df_chunked(lineup_chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    get_sub_totals_df over a lineup history too big to hold at once, e.g. many seasons.
+
+    Each chunk (a week or season of lineups, see iter_lineup_chunks) is solved and grouped on its own,
+    and the per-chunk partial sums are merged into running totals. Only one chunk and the totals
+    (one row per owner/player) are ever in memory, so peak memory doesn't grow with the history length.
+
+    This is for multi-season history pulled outside the pipeline (see memory_benchmark). The pipeline's
+    'sub_totals' dataset still sums its 'subs' dataset, which holds a single season, is updated a
+    team/week at a time and also feeds the bench caption.
+
+    Args:
+        lineup_chunks (Iterable[pd.DataFrame]): Lineup DataFrames covering whole team/weeks
+
+    Returns:
+        pd.DataFrame: Same as get_sub_totals_df on all chunks concatenated
+    """
+    totals = None
+    for chunk in lineup_chunks:
+        if len(chunk) == 0:
+            continue
+        partial = get_sub_totals_df(get_full_sub_df(chunk)).set_index(['team_owner', 'player_name'])
+        totals = partial if totals is None else totals.add(partial, fill_value = 0)
+    if totals is None:
+        return pd.DataFrame(columns = ['team_owner', 'player_name', 'potential_extra_points', 'n_subs'])
+    return totals.astype({'n_subs': int}).reset_index()
+
+def iter_lineup_chunks(leagues: Iterable[League], last_week: int = None) -> Iterator[pd.DataFrame]:
+    """
+    Lazily fetch lineups one week at a time for a sequence of seasons (one League per season).
+
+    Args:
+        leagues (Iterable[League]): ESPN fantasy league obj/connection for each season
+        last_week (int, optional): Last week of each season. Defaults to the regular season length.
+
+    Yields:
+        pd.DataFrame: One week of lineups from get_week_lineup_df
+    """
+    for league in leagues:
+        for week in range(1, (last_week or league.settings.reg_season_count) + 1):
+            yield get_week_lineup_df(week, league)
+
 def get_scoring_df(week: int, league: League) -> pd.DataFrame:
     """Get a DataFrame of all box scores in the league through the given week
 
@@ -635,46 +957,40 @@ def get_scoring_df(week: int, league: League) -> pd.DataFrame:
 
     return scoring_df
 
-def get_lineup_df(week: int, league: League) -> pd.DataFrame:
-    """Get a DataFrame of all box scores in the league through the given week
+def get_week_lineup_df(week: int, league: League) -> pd.DataFrame:
+    """Get a DataFrame of every lineup in the league for a single week
 
     Args:
         week (int): week number
         league (League): ESPN fantasy league obj/connection
 
     Returns:
-        pd.DataFrame: DataFrame of all lineups each week
+        pd.DataFrame: DataFrame of all lineups for the week
     """
-
-    weeks = range(1,week+1)
     teams = []
     players = []
     slot_positions = []
     positions = []
     scores = []
-    week_list = []
-    for week in weeks:
-        for box in league.box_scores(week):
-            for player in box.home_lineup:
-                players.append(player)
-                scores.append(player.points)
-                positions.append(player.position)
-                slot_positions.append(player.slot_position)
-                teams.append(box.home_team)
-                week_list.append(week)
-            for player in box.away_lineup:
-                players.append(player)
-                scores.append(player.points)
-                positions.append(player.position)
-                slot_positions.append(player.slot_position)
-                teams.append(box.away_team)
-                week_list.append(week)
+    for box in league.box_scores(week):
+        for player in box.home_lineup:
+            players.append(player)
+            scores.append(player.points)
+            positions.append(player.position)
+            slot_positions.append(player.slot_position)
+            teams.append(box.home_team)
+        for player in box.away_lineup:
+            players.append(player)
+            scores.append(player.points)
+            positions.append(player.position)
+            slot_positions.append(player.slot_position)
+            teams.append(box.away_team)
     lineup_df = pd.DataFrame({'team': teams,
                             'player': players,
                             'position': positions,
                             'slot_position': slot_positions,
                             'points': scores,
-                            'week': week_list})
+                            'week': week})
     lineup_df['player_id']   = lineup_df['player'].apply(lambda x: x.playerId)
     lineup_df['player_name'] = lineup_df['player'].apply(lambda x: x.name)
     lineup_df['team_name']   = lineup_df['team'].apply(lambda x: x.team_name)
@@ -683,6 +999,43 @@ def get_lineup_df(week: int, league: League) -> pd.DataFrame:
 
     return lineup_df
 
+def get_lineup_df(week: int, league: League) -> pd.DataFrame:
+    """Get a DataFrame of all box scores in the league through the given week
+
+    Args:
+        week (int): week number
+        league (League): ESPN fantasy league obj/connection
+
+    Returns:
+        pd.DataFrame: DataFrame of all lineups each week
+    """
+    return pd.concat([get_week_lineup_df(wk, league) for wk in range(1,week+1)], ignore_index=True)
+
+def get_final_matchups(league: League) -> dict:
+    """Matchups of every week ESPN has finished scoring, from a single request of the small matchup score view.
+
+    A week is final once every matchup in it has a winner (ESPN leaves them 'UNDECIDED' until the
+    scoring period is processed), so in-progress weeks are never included. Byes are left out.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+
+    Returns:
+        dict: Week number to list of (home team, away team, home score, away score), teams being espn_api Team objects
+    """
+    data = league.espn_request.league_get(params={'view': 'mMatchupScore'})
+    teams = {team.team_id: team for team in league.teams}
+    weeks = {}
+    undecided = set()
+    for m in data['schedule']:
+        week = m['matchupPeriodId']
+        if m.get('winner', 'UNDECIDED') == 'UNDECIDED':
+            undecided.add(week)
+        if 'away' in m:
+            weeks.setdefault(week, []).append((teams[m['home']['teamId']], teams[m['away']['teamId']],
+                                               m['home']['totalPoints'], m['away']['totalPoints']))
+    return {week: matchups for week, matchups in weeks.items() if week not in undecided}
+
 def get_weekly_scores_df(week: int, league: League) -> pd.DataFrame:
     """Go through box scores and compute the "record vs. entire league" metrics needed for the report.
 
@@ -764,6 +1117,52 @@ class ReplacementBoxPlayer():
             return 0
 
 
+class SeasonCalendar():
+    ## Maps ESPN epoch-millisecond timestamps to fantasy weeks. Build once per season with get_season_calendar
+    ### and reuse it for every lookup (e.g. the whole activity log) instead of rebuilding the weekly dates each time.
+    def __init__(self, season_start_date: datetime.datetime, final_week_number: int):
+        self.season_start_date = season_start_date
+        self.final_week_number = final_week_number
+        week_starts = [season_start_date + datetime.timedelta(weeks=i) for i in range(final_week_number)]
+        self.week_start_ms = np.array([int(d.timestamp()*1000) for d in week_starts], dtype=np.int64)
+
+    @classmethod
+    def from_league(cls, league: League, season_start_date: datetime.datetime):
+        ## Season length comes from the league's schedule (17 weeks before 2021, 18 after, etc.)
+        final_week_number = getattr(league, 'finalScoringPeriod', None) or getattr(league.settings, 'reg_season_count', 17)
+        return cls(season_start_date, final_week_number)
+
+    def week_of(self, timestamp: float) -> int:
+        """Week in progress at the timestamp (0 if before the season starts)."""
+        return int(np.searchsorted(self.week_start_ms, timestamp, side='right'))
+
+    def week_after(self, timestamp: float) -> int:
+        """First week starting after the timestamp (final_week_number + 1 if there are none left)."""
+        return self.week_of(timestamp) + 1
+
+    def weeks_after(self, timestamps) -> np.ndarray:
+        """Vectorized week_after for an array/Series of timestamps."""
+        return np.searchsorted(self.week_start_ms, np.asarray(timestamps), side='right') + 1
+
+
+_season_calendars = {}
+
+def get_season_calendar(league: League, season_start_date: datetime.datetime) -> SeasonCalendar:
+    """Get the SeasonCalendar for the league's season, building it only the first time.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        season_start_date (datetime.datetime): date that the season started
+
+    Returns:
+        SeasonCalendar: calendar for the league's season
+    """
+    key = (league.league_id, league.year, season_start_date)
+    if key not in _season_calendars:
+        _season_calendars[key] = SeasonCalendar.from_league(league, season_start_date)
+    return _season_calendars[key]
+
+
 def get_start_week_after_trade(trade_date: float, season_start_date: datetime.datetime, final_week_number: int) -> int:
     """Find the first week of the season after the trade
 
@@ -773,24 +1172,13 @@ def get_start_week_after_trade(trade_date: float, season_start_date: datetime.da
         final_week_number (int): last week number of the season
 
     Returns:
-        int: first week number after the trade
-    """
-    weeks = []
-    dates = []
-    week = 1
-    date = season_start_date
-    for i in range(1, final_week_number+1):
-        weeks.append(week)
-        dates.append(date)
-        date = date + datetime.timedelta(days=7)
-        week+=1
-    dates_df = pd.DataFrame({'week': weeks, 'date':dates})
-    sub_dates_df = dates_df[dates_df['date'] > datetime.fromtimestamp(trade_date/1000)]
-    min_week_after_trade = list(sub_dates_df[sub_dates_df['date'] == sub_dates_df['date'].min()]['week'])[0]
-    return min_week_after_trade
-
-
-def get_point_diff_for_trade(league: League, team: Team, start_week: int, players_added: List[Player], players_lost: List[Player]) -> float:
+        int: first week number after the trade (final_week_number + 1 if the trade was after the last week started)
+    """
+    return SeasonCalendar(season_start_date, final_week_number).week_after(trade_date)
+
+
+def get_point_diff_for_trade(league: League, team: Team, start_week: int, players_added: List[Player], players_lost: List[Player],
+                             final_week_number: int = 17, starter_counts: dict = None) -> float:
     """Finds the 
 
     Args:
@@ -799,14 +1187,16 @@ def get_point_diff_for_trade(league: League, team: Team, start_week: int, player
         start_week (int): first week after the trade
         players_added (List): list of player objects that were received by the team in the trade
         players_lost (List): list of player objects that were traded away by the team in the trade
+        final_week_number (int, optional): last week number of the season. Defaults to 17.
+        starter_counts (dict, optional): From get_starter_counts, pass it in when evaluating several trades. Defaults to None (fetched).
 
     Returns:
         float: number of points added/lost based on optimal lineups with new players vs optimal lineups with old players for ROS.
     """
-    starter_counts = get_starter_counts(league)
+    starter_counts = starter_counts or get_starter_counts(league)
     names_in_trade = [p.name for p in players_added] + [p.name for p in players_lost]
     total_point_diff = 0
-    for week in range(start_week, 18): ## Hard coded last week of season
+    for week in range(start_week, final_week_number+1):
         boxes = league.box_scores(week)
         week_lineup = [box.home_lineup if team.team_name == box.home_team.team_name else box.away_lineup for box in boxes 
                        if team.team_name in [box.home_team.team_name, box.away_team.team_name]]
@@ -822,29 +1212,55 @@ def get_point_diff_for_trade(league: League, team: Team, start_week: int, player
     return total_point_diff
 
 
-def get_trade_evalutions_df(league: League, season_start_date, final_week_number=17) -> pd.DataFrame:
+def get_trade_evalutions_df(league: League, season_start_date, final_week_number=None,
+                            activity_df: pd.DataFrame = None, checkpoint_path: str = None) -> pd.DataFrame:
     """Compiles a DataFrame of all retroactively evaluated trades for the fantasy season based on ROS value for a team's roster.
 
     Args:
         league (League): ESPN fantasy league obj/connection
+        season_start_date (datetime.datetime): date that the season started
+        final_week_number (int, optional): last week number of the season. Defaults to None (from the league's schedule).
+        activity_df (pd.DataFrame, optional): Local activity log from activity_log.load_activity_log_df.
+            Defaults to None, in which case the log is brought up to date and loaded.
+        checkpoint_path (str, optional): Fetch checkpoint for the player lookups. Defaults to None.
 
     Returns:
         pd.DataFrame: DataFrame of all retroactively evaluated trades for the fantasy season
+            (trades with a player that couldn't be fetched are left out and the DataFrame flagged as incomplete)
     """
+    if activity_df is None:
+        log_path = al.get_activity_log_path(league)
+        al.update_activity_log(league, log_path)
+        activity_df = al.load_activity_log_df(log_path)
+
+    if final_week_number is None:
+        calendar = get_season_calendar(league, season_start_date)
+        final_week_number = calendar.final_week_number
+    else:
+        calendar = SeasonCalendar(season_start_date, final_week_number)
 
+    teams_by_id = {team.team_id: team for team in league.teams}
     team_list = []
     players_added_list = []
     players_lost_list = []
     week_after_trade_list = []
     point_diff_list = []
-    league_trades = league.recent_activity(size=100, msg_type='TRADED')
-    for trade in league_trades:
-        teams = list(set([action[0] for action in trade.actions]))
-        for team in teams:
-            players_added = [action[2] for action in trade.actions if action[0] != team]
-            players_lost  = [action[2] for action in trade.actions if action[0] == team]
-            start_week = get_start_week_after_trade(trade.date, season_start_date=season_start_date, final_week_number=final_week_number)
-            point_diff = get_point_diff_for_trade(team, start_week, players_added, players_lost)
+    league_trades = activity_df[activity_df['action'] == 'TRADED'].copy()
+    league_trades['week_after_trade'] = calendar.weeks_after(league_trades['date'])
+    players_by_id, failed = get_player_objs(league, list(league_trades['player_id']), list(league_trades['player_name']),
+                                            checkpoint_path)
+    starter_counts = get_starter_counts(league) if len(league_trades) > 0 else None
+    for _, trade in league_trades.groupby('date'):
+        players = [players_by_id.get(player_id) for player_id in trade['player_id']]
+        if any(p is None for p in players):
+            continue
+        for team_id in trade['team_id'].unique():
+            team = teams_by_id[team_id]
+            players_added = [p for p, t in zip(players, trade['team_id']) if t != team_id]
+            players_lost  = [p for p, t in zip(players, trade['team_id']) if t == team_id]
+            start_week = trade['week_after_trade'].iloc[0]
+            point_diff = get_point_diff_for_trade(league, team, start_week, players_added, players_lost,
+                                                  final_week_number=final_week_number, starter_counts=starter_counts)
             team_list.append(team)
             players_added_list.append(players_added)
             players_lost_list.append(players_lost)
@@ -856,4 +1272,6 @@ def get_trade_evalutions_df(league: League, season_start_date, final_week_number
                                         'players_lost': players_lost_list, 'week_after_trade': week_after_trade_list
                                         ,'point_diff': point_diff_list
                                         })
-    return trade_evaluations_df
\ No newline at end of file
+    if len(failed) > 0:
+        rf.mark_incomplete(trade_evaluations_df, 'trades: ' + rf.describe_failures('players', failed))
+    return trade_evaluations_df
@@ -0,0 +1,148 @@
+import os
+import json
+from espn_api.football import League
+
+import data_utils as du
+
+H2H_DIR = 'data/cache'
+
+class HeadToHeadIndex():
+    ## All-time series stats for every pair of owners, updated one matchup at a time.
+    ### Pairs are stored under the alphabetically first owner, so lookups in either order are a single dict access.
+    def __init__(self, matchups: list = None, pairs: dict = None):
+        ## (season, week, team_a, team_b, score_a, score_b), in the order they were added
+        self.matchups = matchups or []
+        self.pairs = pairs or {}
+        self.applied = {(m[0], m[1]) for m in self.matchups}
+
+    def __eq__(self, other) -> bool:
+        ## Same results in the same order (matchups loaded from json are lists, ones added since are tuples)
+        return (isinstance(other, HeadToHeadIndex) and
+                [tuple(m) for m in self.matchups] == [tuple(m) for m in other.matchups] and self.pairs == other.pairs)
+
+    @staticmethod
+    def _pair_key(team_a: str, team_b: str) -> str:
+        return '|'.join(sorted([team_a, team_b]))
+
+    def add_matchup(self, season: int, week: int, team_a: str, team_b: str, score_a: float, score_b: float):
+        """Add one result. Matchups must be added in chronological order for streaks to be right."""
+        self.matchups.append((season, week, team_a, team_b, score_a, score_b))
+        self.applied.add((season, week))
+        ## Store from the perspective of the alphabetically first team
+        if team_a > team_b:
+            team_a, team_b, score_a, score_b = team_b, team_a, score_b, score_a
+        pair = self.pairs.setdefault(self._pair_key(team_a, team_b),
+                                     {'games': 0, 'wins': 0, 'losses': 0, 'ties': 0, 'margin': 0.0,
+                                      'streak': 0, 'last_season': None, 'last_week': None})
+        result = 1 if score_a > score_b else -1 if score_a < score_b else 0
+        pair['games'] += 1
+        pair['wins'] += result == 1
+        pair['losses'] += result == -1
+        pair['ties'] += result == 0
+        pair['margin'] += score_a - score_b
+        ## Positive streak = consecutive wins for the first team, negative for the second
+        if result == 0:
+            pair['streak'] = 0
+        elif result * pair['streak'] > 0:
+            pair['streak'] += result
+        else:
+            pair['streak'] = result
+        pair['last_season'], pair['last_week'] = season, week
+
+    def record(self, team_a: str, team_b: str) -> dict:
+        """
+        All-time series between two teams from team_a's point of view.
+
+        Returns:
+            dict: 'games', 'wins', 'losses', 'ties', 'avg_margin' and 'streak' (positive = team_a's win streak)
+        """
+        pair = self.pairs.get(self._pair_key(team_a, team_b))
+        if pair is None:
+            return {'games': 0, 'wins': 0, 'losses': 0, 'ties': 0, 'avg_margin': 0.0, 'streak': 0}
+        sign = 1 if team_a < team_b else -1
+        return {'games': pair['games'],
+                'wins': pair['wins'] if sign == 1 else pair['losses'],
+                'losses': pair['losses'] if sign == 1 else pair['wins'],
+                'ties': pair['ties'],
+                'avg_margin': sign * pair['margin'] / pair['games'],
+                'streak': sign * pair['streak']}
+
+    def drop_weeks_from(self, season: int, week: int):
+        """Remove a season's results from `week` on (e.g. after stat corrections), so they can be re-added in order."""
+        kept = [m for m in self.matchups if not (m[0] == season and m[1] >= week)]
+        self.matchups, self.pairs, self.applied = [], {}, set()
+        for m in kept:
+            self.add_matchup(*m)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+        with open(path, 'w') as f:
+            json.dump({'matchups': self.matchups, 'pairs': self.pairs}, f)
+
+    @classmethod
+    def load(cls, path: str):
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            state = json.load(f)
+        return cls([tuple(m) for m in state['matchups']], state['pairs'])
+
+
+def get_h2h_path(league: League) -> str:
+    """Path of the head-to-head index shared by every season of a league."""
+    return os.path.join(H2H_DIR, f'head-to-head-{league.league_id}.json')
+
+def get_team_key(team) -> str:
+    """Owners stay the same across seasons while team names change, so key teams by owner when it's set."""
+    return getattr(team, 'owner', None) or team.team_name
+
+def update_head_to_head(league: League, week: int, path: str = None) -> HeadToHeadIndex:
+    """
+    Add any of the league's weeks 1 through `week` that aren't in the index yet, then save it.
+
+    Only weeks ESPN has finished scoring are added, so a week still being played is picked up once
+    it's final instead of being stored with partial scores.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        week (int): Last week to include
+        path (str, optional): Index path. Defaults to get_h2h_path(league).
+
+    Returns:
+        HeadToHeadIndex: The updated index
+    """
+    path = path or get_h2h_path(league)
+    index = HeadToHeadIndex.load(path)
+    new_weeks = [wk for wk in range(1, week+1) if (league.year, wk) not in index.applied]
+    if len(new_weeks) == 0:
+        return index
+    final_matchups = du.get_final_matchups(league)
+    ## Matchups have to be added in order, so stop at the first week that isn't final
+    new_weeks = new_weeks[:next((i for i, wk in enumerate(new_weeks) if wk not in final_matchups), len(new_weeks))]
+    for wk in new_weeks:
+        for home_team, away_team, home_score, away_score in final_matchups[wk]:
+            index.add_matchup(league.year, wk, get_team_key(home_team), get_team_key(away_team),
+                              home_score, away_score)
+    if len(new_weeks) > 0:
+        index.save(path)
+    return index
+
+def get_week_pairs(index: HeadToHeadIndex, season: int, week: int) -> list:
+    """(team_a, team_b) for each matchup of a week already in the index."""
+    return [(m[2], m[3]) for m in index.matchups if m[0] == season and m[1] == week]
+
+def rivalry_caption(index: HeadToHeadIndex, team_a: str, team_b: str) -> str:
+    """One line summary of the all-time series between two teams, e.g. for a GroupMe caption."""
+    r = index.record(team_a, team_b)
+    if r['games'] == 0:
+        return f'{team_a} and {team_b} have never played.'
+    if r['wins'] == r['losses']:
+        series = f"series tied {r['wins']}-{r['losses']}"
+    else:
+        leader = team_a if r['wins'] > r['losses'] else team_b
+        series = f"{leader} leads {max(r['wins'], r['losses'])}-{min(r['wins'], r['losses'])}"
+    if r['ties'] > 0:
+        series += f"-{r['ties']}"
+    if abs(r['streak']) > 1:
+        series += f", {team_a if r['streak'] > 0 else team_b} has won {abs(r['streak'])} straight"
+    return f"{team_a} vs. {team_b}: {series}."
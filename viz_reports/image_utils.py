@@ -1,7 +1,7 @@
+import asyncio
 from PIL import Image
 
-import visuals as viz
-import data_utils as du
+import pipeline
 
 ### TODO Create functions to stitch images together (from https://www.tutorialspoint.com/python_pillow/Python_pillow_merging_images.htm)
 def combine_images(image_path_1, image_path_2, report_name, week):
@@ -18,9 +18,14 @@ def combine_images(image_path_1, image_path_2, report_name, week):
     new_image.paste(image2,(image1_size[0],0))
     new_image.save(f"data/plots/report_{report_name}_week_{week}.jpg","JPEG")
 
-## TODO: `save_all_visuals` function to run all of the functions from visuals.py
 def save_all_visuals(league, week):
-    draft_df = du.get_draft_df(league)
+    """Create and save all of the weekly report images.
 
-    viz.biggest_steals_chart(week)
-    viz.biggest_busts_chart(week)
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        week (int): Week number
+
+    Returns:
+        list: Paths to the report images
+    """
+    return asyncio.run(pipeline.run_weekly_reports(league, week))
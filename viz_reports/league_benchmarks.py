@@ -0,0 +1,146 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from espn_api.football import League
+
+import data_utils as du
+
+## Shared by every league and season we run, so a team's week can be compared with all of them
+BENCHMARKS_DIR = 'data/benchmarks'
+STORE_COLUMNS = ['league_id', 'season', 'week', 'team', 'score', 'bench_points', 'optimal_pct']
+METRICS = ['score', 'bench_points', 'optimal_pct']
+## Quantiles kept per metric (every 0.1%). Lookups are a binary search over these, however many weeks are stored.
+SKETCH_SIZE = 1001
+
+def get_store_path(benchmarks_dir: str = BENCHMARKS_DIR) -> str:
+    """Per-team weekly aggregates for every league/season."""
+    return os.path.join(benchmarks_dir, 'team-weeks.csv.gz')
+
+def get_sketch_path(benchmarks_dir: str = BENCHMARKS_DIR) -> str:
+    """Quantile sketches of STORE_COLUMNS' metrics, all percentile lookups need."""
+    return os.path.join(benchmarks_dir, 'sketches.json')
+
+def get_team_week_stats_df(lineup_df: pd.DataFrame, starter_counts: dict) -> pd.DataFrame:
+    """
+    Score, bench points and score as a pct. of the optimal lineup for every team/week.
+
+    Args:
+        lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
+        starter_counts (dict): From data_utils.get_starter_counts
+
+    Returns:
+        pd.DataFrame: One row per team/week with 'team' (owner) and the METRICS columns
+    """
+    scores_df = du.get_optimal_scores_df(lineup_df, starter_counts)
+    bench_points = (lineup_df[lineup_df['slot_position'] == 'BE'].groupby(['team_name', 'week'])['points'].sum()
+                    .rename('bench_points'))
+    owners = lineup_df.drop_duplicates(['team_name', 'week']).set_index(['team_name', 'week'])['team_owner']
+    stats_df = scores_df.set_index(['team_name', 'week']).join(bench_points).join(owners)
+    return pd.DataFrame({'week': stats_df.index.get_level_values('week'),
+                         'team': stats_df['team_owner'].to_numpy(),
+                         'score': stats_df['actual_score'].to_numpy(),
+                         'bench_points': stats_df['bench_points'].fillna(0).to_numpy(),
+                         'optimal_pct': stats_df['score_pct'].to_numpy()})
+
+
+class QuantileSketches():
+    ## SKETCH_SIZE evenly spaced quantiles of each metric over every stored team/week. A value's percentile
+    ### is the share of the sketch at or below it (exact to within 1/SKETCH_SIZE), found by binary search.
+    def __init__(self, sketches: dict = None, n: int = 0):
+        self.sketches = {metric: np.asarray(values) for metric, values in (sketches or {}).items()}
+        self.n = n
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, QuantileSketches) and self.n == other.n and self.sketches.keys() == other.sketches.keys() and
+                all(np.array_equal(sketch, other.sketches[metric]) for metric, sketch in self.sketches.items()))
+
+    @classmethod
+    def from_store(cls, store_df: pd.DataFrame):
+        probs = np.linspace(0, 1, SKETCH_SIZE)
+        if len(store_df) == 0:
+            return cls()
+        return cls({metric: np.quantile(store_df[metric].to_numpy(dtype = float), probs) for metric in METRICS},
+                   len(store_df))
+
+    def percentile(self, metric: str, values):
+        """
+        Share of all stored team/weeks with `metric` at or below each value (0-1).
+
+        Args:
+            metric (str): One of METRICS
+            values (float or array-like): Values to look up
+
+        Returns:
+            float or np.ndarray: Percentile of each value (nan if nothing is stored yet)
+        """
+        sketch = self.sketches.get(metric)
+        if sketch is None:
+            return np.full(np.shape(values), np.nan)[()]
+        return (np.searchsorted(sketch, values, side = 'right') / len(sketch))[()]
+
+    def value_at(self, metric: str, pct):
+        """Value of `metric` at the given percentile(s), e.g. 0.95 for the score it takes to be top 5%."""
+        sketch = self.sketches.get(metric)
+        if sketch is None:
+            return np.full(np.shape(pct), np.nan)[()]
+        return np.interp(pct, np.linspace(0, 1, len(sketch)), sketch)
+
+    def save(self, path: str):
+        ## Written next to the old copy and swapped in, captions may be reading it at the same time
+        os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'n': self.n, 'sketches': {metric: sketch.round(3).tolist()
+                                                 for metric, sketch in self.sketches.items()}}, f)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path: str):
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            state = json.load(f)
+        return cls(state['sketches'], state['n'])
+
+
+def load_benchmark_store(path: str) -> pd.DataFrame:
+    if not os.path.exists(path):
+        return pd.DataFrame(columns = STORE_COLUMNS)
+    return pd.read_csv(path, dtype = {'team': 'category'})
+
+def update_benchmarks(league: League, lineup_df: pd.DataFrame, starter_counts: dict,
+                      benchmarks_dir: str = BENCHMARKS_DIR) -> QuantileSketches:
+    """
+    Replace the league/season's rows in the benchmark store with the weeks in lineup_df (so stat
+    corrections carry over), then rebuild and save the quantile sketches.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
+        starter_counts (dict): From data_utils.get_starter_counts
+        benchmarks_dir (str, optional): Where the store and sketches are kept. Defaults to BENCHMARKS_DIR.
+
+    Returns:
+        QuantileSketches: Sketches over every league/season in the store
+    """
+    store_path = get_store_path(benchmarks_dir)
+    store_df = load_benchmark_store(store_path)
+    new_df = get_team_week_stats_df(lineup_df, starter_counts)
+    new_df.insert(0, 'season', league.year)
+    new_df.insert(0, 'league_id', league.league_id)
+
+    replaced = ((store_df['league_id'] == league.league_id) & (store_df['season'] == league.year) &
+                store_df['week'].isin(new_df['week']))
+    store_df = pd.concat([store_df[~replaced], new_df[STORE_COLUMNS]], ignore_index = True)
+    os.makedirs(benchmarks_dir, exist_ok = True)
+    store_df.round(2).to_csv(store_path, index = False)
+
+    sketches = QuantileSketches.from_store(store_df)
+    sketches.save(get_sketch_path(benchmarks_dir))
+    return sketches
+
+def describe_percentile(pct: float) -> str:
+    """0.97 -> 'top 3%', 0.1 -> 'bottom 10%'"""
+    if pct >= 0.5:
+        return f'top {max(1 - pct, 0.001):.1%}'.replace('.0%', '%')
+    return f'bottom {max(pct, 0.001):.1%}'.replace('.0%', '%')
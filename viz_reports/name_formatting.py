@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from operator import attrgetter
+
+## Formatted forms of every distinct name seen so far this process, per format. Player and owner names
+### repeat across charts and seasons, so each is only ever formatted once.
+_formatted_names = {'short': {}, 'first': {}}
+
+def _short_name(names: pd.Series) -> pd.Series:
+    """'Justin Jefferson' -> 'J. Jefferson'. D/STs and single-word names are kept as-is."""
+    second = names.str.split(' ').str[1]
+    short = names.str[0] + '. ' + second
+    return short.where(second.notna() & (second != '') & ~names.str.endswith('D/ST'), names)
+
+def _first_name(names: pd.Series) -> pd.Series:
+    """'Ryan Smith' -> 'Ryan'. There are multiple Matthews in the league, so they get a last initial: 'Matt S.'"""
+    parts = names.str.split(' ')
+    first, second = parts.str[0], parts.str[1]
+    matt = ('Matt ' + second.str[0] + '.').fillna('Matt')
+    return first.where(first != 'Matthew', matt)
+
+_FORMATTERS = {'short': _short_name, 'first': _first_name}
+
+def format_names(names: pd.Series, kind: str) -> pd.Series:
+    """
+    Format a column of names, working on its distinct values (categories) and reusing cached results.
+
+    Args:
+        names (pd.Series): Names (str or categorical)
+        kind (str): 'short' ('J. Jefferson') or 'first' (owner first names)
+
+    Returns:
+        pd.Series: Formatted names, same index as `names`
+    """
+    cache = _formatted_names[kind]
+    names = names.astype('category')
+    categories = names.cat.categories.astype(str)
+    missing = pd.Series([c for c in categories if c not in cache], dtype = object)
+    if len(missing) > 0:
+        cache.update(zip(missing, _FORMATTERS[kind](missing)))
+    formatted = np.array([cache[c] for c in categories] + [''], dtype = object)
+    ## Code -1 (missing name) picks the trailing ''
+    return pd.Series(formatted[names.cat.codes.to_numpy()], index = names.index)
+
+def short_names(names: pd.Series) -> pd.Series:
+    return format_names(names, 'short')
+
+def first_names(names: pd.Series) -> pd.Series:
+    return format_names(names, 'first')
+
+def join_player_names(players: pd.Series, sep: str = ', ') -> pd.Series:
+    """Join each row's list of espn_api Player objects into one string of names."""
+    exploded = players.reset_index(drop = True).explode().dropna()
+    joined = exploded.map(attrgetter('name')).groupby(level = 0).agg(sep.join)
+    return pd.Series(joined.reindex(range(len(players)), fill_value = '').to_numpy(), index = players.index)
+
+def trade_labels(trade_eval_df: pd.DataFrame) -> pd.Series:
+    """'<owner>\\ntrade <players lost>\\nfor <players added>' for each row of data_utils.get_trade_evalutions_df."""
+    owners = trade_eval_df['team'].map(attrgetter('owner'))
+    return (owners + '\ntrade ' + join_player_names(trade_eval_df['players_lost']) +
+            '\nfor ' + join_player_names(trade_eval_df['players_added']))
@@ -0,0 +1,166 @@
+import os
+import json
+import asyncio
+import functools
+import matplotlib
+matplotlib.use('Agg') ## Charts are drawn off the main thread
+from concurrent.futures import ThreadPoolExecutor
+from espn_api.football import League
+from typing import Callable, List
+
+import registry as rg
+import resilient_fetch as rf
+import transport as tr
+import dashboard
+
+def get_manifest_path(week: int) -> str:
+    """Path of the list of report images (and captions) created for the week (read by "post" mode)."""
+    return f'data/plots/manifest-week-{week}.json'
+
+async def run_weekly_reports(league: League, week: int, post: Callable = None,
+                             reports: List[str] = None, season_start_date=None,
+                             max_workers: int = 8, post_cached: bool = True,
+                             formats: List[str] = ('svg',), write_dashboard: bool = True) -> list:
+    """
+    Build the minimal dataset DAG for the requested reports, then fetch, compute, render
+    and (optionally) post them as overlapping stages.
+
+    Every dataset is computed once (or loaded from the cache if still valid, or patched from
+    its deps' row diffs) and as soon as its deps are ready, independent datasets run in parallel, each chart starts rendering as soon as
+    its datasets are ready (and is skipped if its image was already drawn from the same dataset
+    versions), and finished images are posted in report order while later charts are still drawing.
+    Each image is posted with its registered caption, built from datasets the run already has.
+    Charts drawn from datasets that could only be partly fetched are still posted, flagged as
+    incomplete in their caption and in the manifest, and redrawn by the next run. A report whose
+    datasets, chart or post fail is left out (with the error under 'errors' in the manifest) and the rest still run.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        week (int): Week number
+        post (Callable, optional): Function called with each image path and caption to post it. Defaults to None (create only).
+        reports (List[str], optional): Names of registered reports. Defaults to registry.get_default_reports().
+        season_start_date (datetime.datetime, optional): Needed by the trade reports. Defaults to None.
+        max_workers (int, optional): Max datasets computed at once. Defaults to 8.
+        post_cached (bool, optional): Also post charts that didn't need re-rendering. Defaults to True.
+        formats (List[str], optional): Formats exported next to each PNG from the same render. Defaults to ('svg',).
+        write_dashboard (bool, optional): Also write the week's HTML dashboard. Defaults to True.
+
+    Returns:
+        list: Paths to the report images created, in report order
+    """
+    reports = reports or rg.get_default_reports()
+    ctx = rg.RunContext(league, week, season_start_date)
+    rf.clear_stale_checkpoints(ctx)
+    loop = asyncio.get_running_loop()
+    dataset_pool = ThreadPoolExecutor(max_workers)
+    ## Charts share template figures and rcParams, so all drawing happens on one thread
+    render_pool = ThreadPoolExecutor(1)
+    post_pool = ThreadPoolExecutor(1)
+
+    datasets = {}
+    async def build_dataset(name):
+        upstream = {dep: await datasets[dep] for dep in rg.DATASETS[name].deps}
+        return await loop.run_in_executor(dataset_pool, rg.build_dataset, name, ctx, upstream)
+
+    ## Topological order, so every dep's task exists before its dependents are scheduled
+    for name in rg.get_required_datasets(reports):
+        datasets[name] = asyncio.ensure_future(build_dataset(name))
+
+    async def render(name):
+        report = rg.REPORTS[name]
+        upstream = [await datasets[dataset] for dataset in report.datasets]
+        key = rg.node_key(name, ctx, [version for version, _, _ in upstream] + list(formats))
+        path = rg.load_cached_report(name, ctx, key)
+        if path is not None:
+            return path, False
+        inputs = {dataset: value for dataset, (_, value, _) in zip(report.datasets, upstream)}
+        path = await loop.run_in_executor(render_pool, functools.partial(report.render, inputs, ctx, formats=formats))
+        rg.save_cached_report(name, ctx, key, path)
+        return path, True
+
+    async def get_caption(name):
+        ## A few lookups on finished datasets, cheap enough to run between posts
+        caption = rg.CAPTIONS.get(name)
+        if caption is None:
+            return ''
+        return caption.build({dataset: (await datasets[dataset])[1] for dataset in caption.datasets}, ctx)
+
+    async def get_incomplete_notes(name):
+        ## Partial fetches anywhere upstream of the chart (or its caption)
+        ## (derived DataFrames can carry their source's notes along, so each is only listed once)
+        notes = [note for dataset in rg.get_required_datasets([name]) if not rg.DATASETS[dataset].tag_along
+                 for note in rf.get_incomplete((await datasets[dataset])[1])]
+        return list(dict.fromkeys(notes))
+
+    report_tasks = [asyncio.ensure_future(render(name)) for name in reports]
+    image_paths = {}
+    captions = {}
+    incomplete = {}
+    errors = {}
+    try:
+        for name, task in zip(reports, report_tasks):
+            ## A failing dataset, chart or post only costs its own report, the rest are still drawn and posted
+            try:
+                path, rendered = await task
+                caption = await get_caption(name)
+                notes = await get_incomplete_notes(name)
+                if len(notes) > 0:
+                    incomplete[name] = notes
+                    caption = (caption + ' ' if caption else '') + f"(Incomplete, {'; '.join(notes)}.)"
+                image_paths[name], captions[name] = path, caption
+                if post is not None and (rendered or post_cached):
+                    await loop.run_in_executor(post_pool, post, path, caption)
+            except Exception as e:
+                errors[name] = f'{type(e).__name__}: {e}'
+
+        ## Tag-along datasets no report waits on may still be running
+        results = dict(zip(datasets, await asyncio.gather(*datasets.values(), return_exceptions=True)))
+        for name, result in results.items():
+            if isinstance(result, Exception) and rg.DATASETS[name].tag_along:
+                errors[name] = f'{type(result).__name__}: {result}'
+
+        if write_dashboard:
+            tables = {name: table.build({dataset: results[dataset][1] for dataset in table.datasets}, ctx)
+                      for name, table in rg.TABLES.items()
+                      if all(dataset in results and not isinstance(results[dataset], Exception) for dataset in table.datasets)}
+            dashboard.write_dashboard(week, image_paths, tables, captions=captions)
+    finally:
+        ## Only left running if the run itself was interrupted, cancel them and collect every task's outcome
+        ### so none is left with an exception that's never retrieved
+        tasks = report_tasks + list(datasets.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for pool in [dataset_pool, render_pool, post_pool]:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        ## Written even if the run was cut short, so "post" mode and the next run see what was created
+        with open(get_manifest_path(week), 'w') as f:
+            ## ESPN request totals of the process so far (requests, bytes, latency histogram, status codes)
+            json.dump({'image_paths': list(image_paths.values()), 'captions': list(captions.values()),
+                       'incomplete': incomplete, 'errors': errors,
+                       'transport': tr.get_transport().metrics.summary()}, f)
+    return list(image_paths.values())
+
+def load_manifest(week: int) -> tuple:
+    """
+    Image paths and captions created for the week by run_weekly_reports.
+
+    Returns:
+        tuple: (image paths, captions)
+    """
+    path = get_manifest_path(week)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No reports have been created for week {week} (missing {path}).")
+    with open(path) as f:
+        manifest = json.load(f)
+    return manifest['image_paths'], manifest['captions']
+
+def get_incomplete_reports(week: int) -> dict:
+    """Reports of the week's last run that were drawn from partial data, with what was missing ({} if none)."""
+    path = get_manifest_path(week)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        manifest = json.load(f)
+    return manifest['incomplete']
@@ -0,0 +1,115 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from espn_api.football import League
+
+import data_utils as du
+import head_to_head as h2h
+import resilient_fetch as rf
+
+RATINGS_DIR = 'data/cache'
+INITIAL_RATING = 1500
+K_FACTOR = 20
+
+def get_ratings_path(league: League) -> str:
+    """Path of the persisted rating state for a league/season."""
+    return os.path.join(RATINGS_DIR, f'ratings-{league.league_id}-{league.year}.json')
+
+def load_rating_state(path: str) -> dict:
+    """Rating state saved by save_rating_state, or an empty state (nothing rated yet)."""
+    if not os.path.exists(path):
+        return {'last_week': 0, 'ratings': {}, 'history': []}
+    with open(path) as f:
+        state = json.load(f)
+    ## States saved before ratings were keyed by team id are rebuilt from week 1
+    if any('team_id' not in h for h in state['history']):
+        return {'last_week': 0, 'ratings': {}, 'history': []}
+    return state
+
+def save_rating_state(state: dict, path: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(state, f)
+
+def rewind_rating_state(state: dict, week: int) -> dict:
+    """Roll the state back to before `week` (e.g. after stat corrections), so only weeks from there on are re-applied."""
+    history = [h for h in state['history'] if h['week'] < week]
+    last_week = min(state['last_week'], week - 1)
+    return {'last_week': last_week,
+            'ratings': {h['team_id']: h['rating'] for h in history if h['week'] == last_week},
+            'history': history}
+
+def get_week_matchups(final_matchups: dict, week: int) -> list:
+    """(team id, opponent id, score, opponent score) for each matchup of a final week (from data_utils.get_final_matchups).
+
+    Team ids are strings so ratings round-trip through json, and stay the same when a team is renamed mid-season.
+    """
+    return [(str(home.team_id), str(away.team_id), home_score, away_score)
+            for home, away, home_score, away_score in final_matchups[week]]
+
+def update_ratings(ratings: dict, matchups: list, k: float = K_FACTOR) -> dict:
+    """
+    Apply one week of results to Elo ratings, weighted by margin of victory.
+
+    Only the teams that played are touched, so each week is an O(teams) update.
+
+    Args:
+        ratings (dict): Team id to rating (updated in place, new teams start at INITIAL_RATING)
+        matchups (list): (team, opponent, score, opponent score) tuples from get_week_matchups
+        k (float, optional): Elo K factor. Defaults to K_FACTOR.
+
+    Returns:
+        dict: The updated ratings
+    """
+    for team_a, team_b, score_a, score_b in matchups:
+        rating_a = ratings.get(team_a, INITIAL_RATING)
+        rating_b = ratings.get(team_b, INITIAL_RATING)
+        expected_a = 1/(1 + 10**((rating_b - rating_a)/400))
+        result_a = 1.0 if score_a > score_b else 0.0 if score_a < score_b else 0.5
+        ## Blowouts move ratings more than close games
+        change = k * np.log(abs(score_a - score_b) + 1) * (result_a - expected_a)
+        ratings[team_a] = rating_a + change
+        ratings[team_b] = rating_b - change
+    return ratings
+
+def update_power_rankings(league: League, week: int, path: str = None, rebuild: bool = False) -> pd.DataFrame:
+    """
+    Bring the persisted ratings up to `week`, only applying weeks not already rated.
+
+    Weeks are only applied (and saved) once ESPN has decided every matchup in them, so a run in the
+    middle of a week rates through the last final week and picks the week up once it's final.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        week (int): Last week to include
+        path (str, optional): Rating state path. Defaults to get_ratings_path(league).
+        rebuild (bool, optional): Start over from week 1 (e.g. after stat corrections). Defaults to False.
+
+    Returns:
+        pd.DataFrame: Rating history, one row per team/week with 'team' (owner, see head_to_head.get_team_key),
+            'rating' and 'rank'
+    """
+    path = path or get_ratings_path(league)
+    state = {'last_week': 0, 'ratings': {}, 'history': []} if rebuild else load_rating_state(path)
+
+    if state['last_week'] < week:
+        final_matchups = du.get_final_matchups(league)
+        for wk in range(state['last_week'] + 1, week + 1):
+            if wk not in final_matchups:
+                break
+            update_ratings(state['ratings'], get_week_matchups(final_matchups, wk))
+            state['history'] += [{'week': wk, 'team_id': team_id, 'rating': rating}
+                                 for team_id, rating in state['ratings'].items()]
+            state['last_week'] = wk
+        save_rating_state(state, path)
+
+    ratings_df = pd.DataFrame(state['history'], columns = ['week', 'team_id', 'rating'])
+    ratings_df = ratings_df[ratings_df['week'] <= week].copy()
+    team_keys = {str(team.team_id): h2h.get_team_key(team) for team in league.teams}
+    ratings_df['team'] = ratings_df['team_id'].map(team_keys)
+    if state['last_week'] < week:
+        ## Rebuilt on the next run, by when the week may be final
+        rf.mark_incomplete(ratings_df, f"power rankings: only rated through week {state['last_week']}, week {week} isn't final")
+    ratings_df['rank'] = ratings_df.groupby('week')['rating'].rank(method = 'min', ascending = False).astype(int)
+    return ratings_df
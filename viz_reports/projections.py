@@ -0,0 +1,102 @@
+import os
+import pandas as pd
+from espn_api.football import League
+
+import data_utils as du
+
+PROJECTIONS_DIR = 'data/projections'
+STORE_COLUMNS = ['week', 'player_id', 'player_name', 'position', 'team_owner', 'projected_points']
+
+def get_projection_store_path(league: League) -> str:
+    """Path of the local projection snapshots for a league/season."""
+    return os.path.join(PROJECTIONS_DIR, f'projections-{league.league_id}-{league.year}.csv.gz')
+
+def load_projection_store(path: str) -> pd.DataFrame:
+    """All snapshotted projections, with repeated strings stored as categoricals."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns = STORE_COLUMNS)
+    store_df = pd.read_csv(path, dtype = {'player_name': 'category', 'position': 'category', 'team_owner': 'category',
+                                          'projected_points': 'float32'})
+    return store_df
+
+def capture_projections(lineup_df: pd.DataFrame, path: str, overwrite: bool = False) -> int:
+    """
+    Snapshot each rostered player's projected points for the weeks in lineup_df (from the box
+    score player objects already in it, no extra API calls).
+
+    Player/weeks already in the store are kept as-is unless overwrite is True, since the first snapshot
+    (taken before games lock) is the one worth comparing against. Players added to a roster after a
+    week was first captured are still added.
+
+    Args:
+        lineup_df (pd.DataFrame): DataFrame of lineups from data_utils.get_lineup_df/get_week_lineup_df
+        path (str): Store path
+        overwrite (bool, optional): Replace player/weeks that were already captured. Defaults to False.
+
+    Returns:
+        int: Number of player/week projections written
+    """
+    store_df = load_projection_store(path)
+    captured = pd.MultiIndex.from_frame(store_df[['week', 'player_id']])
+    new_keys = pd.MultiIndex.from_frame(lineup_df[['week', 'player_id']])
+    new_df = lineup_df if overwrite else lineup_df[~new_keys.isin(captured)]
+    new_df = new_df.drop_duplicates(['week', 'player_id'])
+    if len(new_df) == 0:
+        return 0
+
+    new_df = pd.DataFrame({'week': new_df['week'],
+                           'player_id': new_df['player_id'],
+                           'player_name': new_df['player_name'],
+                           'position': new_df['position'],
+                           'team_owner': new_df['team_owner'],
+                           'projected_points': new_df['player'].apply(lambda x: x.projected_points)})
+    kept = ~captured.isin(pd.MultiIndex.from_frame(new_df[['week', 'player_id']]))
+    store_df = pd.concat([store_df[kept].astype({'player_name': str, 'position': str, 'team_owner': str}),
+                          new_df], ignore_index = True).sort_values(['week', 'player_id'])
+    os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+    store_df.to_csv(path, index = False, compression = 'gzip')
+    return len(new_df)
+
+def capture_week_projections(league: League, week: int, path: str = None, overwrite: bool = False) -> int:
+    """Fetch the week's box scores and snapshot the projections (run before games lock, see scheduler.poll_once)."""
+    return capture_projections(du.get_week_lineup_df(week, league), path or get_projection_store_path(league), overwrite)
+
+def get_projection_errors_df(store_df: pd.DataFrame, lineup_df: pd.DataFrame, starters_only: bool = True) -> pd.DataFrame:
+    """
+    Join snapshotted projections to actual points.
+
+    Args:
+        store_df (pd.DataFrame): DataFrame from load_projection_store
+        lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
+        starters_only (bool, optional): Only count players in the starting lineup. Defaults to True.
+
+    Returns:
+        pd.DataFrame: One row per player/week with 'points', 'projected_points' and 'points_over_projection'
+    """
+    actual_df = lineup_df
+    if starters_only:
+        actual_df = actual_df[~actual_df['slot_position'].isin(['BE', 'IR'])]
+    errors_df = (actual_df[['week', 'player_id', 'slot_position', 'points']]
+                 .merge(store_df, on = ['week', 'player_id'], how = 'inner'))
+    errors_df['points_over_projection'] = errors_df['points'] - errors_df['projected_points']
+    return errors_df
+
+def summarize_projection_errors(errors_df: pd.DataFrame, by: str) -> pd.DataFrame:
+    """
+    Aggregate projection error by team ('team_owner'), 'position' or player ('player_name').
+
+    Args:
+        errors_df (pd.DataFrame): DataFrame from get_projection_errors_df
+        by (str): Column to group by
+
+    Returns:
+        pd.DataFrame: Total and mean points over projection, mean absolute error and count, best first
+    """
+    errors_df = errors_df.assign(abs_error = errors_df['points_over_projection'].abs())
+    return (errors_df.groupby(by, observed = True)
+            .agg(total_over_projection = ('points_over_projection', 'sum'),
+                 mean_over_projection = ('points_over_projection', 'mean'),
+                 mean_abs_error = ('abs_error', 'mean'),
+                 n = ('points_over_projection', 'size'))
+            .sort_values('total_over_projection', ascending = False)
+            .reset_index())
@@ -0,0 +1,601 @@
+import os
+import json
+import time
+import pickle
+import inspect
+import hashlib
+import datetime
+import pandas as pd
+from typing import Callable, List
+
+import visuals as viz
+import data_utils as du
+import activity_log as al
+import simulation as sim
+import schedule_luck as sl
+import counterfactual as cf
+import waiver_wire as ww
+import power_rankings as pr
+import projections as pj
+import head_to_head as h2h
+import league_benchmarks as lb
+import replacement_level as rl
+import change_detection as cd
+import captions as cap
+import resilient_fetch as rf
+
+DATASET_CACHE_DIR = 'data/cache/datasets'
+REPORT_CACHE_DIR = 'data/cache/reports'
+
+class Dataset():
+    ## A node in the report DAG that builds a DataFrame (or array) from the league and/or other datasets.
+    ### `build(ctx, inputs)` gets the RunContext and a dict of the upstream datasets named in `deps`.
+    ### `max_age` is how long a cached copy stays valid (None = only rebuild when an upstream changes).
+    ### `diff_keys`/`diff_columns` let a rebuilt copy be diffed against the stored one row by row, and
+    ### `update(ctx, inputs, previous, changes)` (optional) patches the stored copy from the upstream row diffs
+    ### instead of rebuilding everything. A `tag_along` dataset isn't needed by any report, it's built in every run
+    ### that already needs all of its deps (for what it saves to disk, e.g. the benchmark store).
+    def __init__(self, name: str, build: Callable, deps: List[str] = None,
+                 max_age: datetime.timedelta = None, diff_keys: List[str] = None,
+                 diff_columns: List[str] = None, tag_along: bool = False):
+        self.name = name
+        self.build = build
+        self.deps = deps or []
+        self.max_age = max_age
+        self.diff_keys = diff_keys
+        self.diff_columns = diff_columns
+        self.tag_along = tag_along
+        self.update = None
+
+
+class Report():
+    ## A chart in the report DAG. `render(inputs, ctx, **params)` draws it from the named datasets and returns
+    ### the image path. `params` are passed through to `chart`, the visuals function it draws with (e.g. top_n,
+    ### steals_after_rd, or the export formats the pipeline asks for).
+    def __init__(self, name: str, render: Callable, datasets: List[str], default: bool = True, chart: Callable = None):
+        self.name = name
+        self.render = render
+        self.datasets = datasets
+        self.default = default
+        self.chart = chart
+
+    def param_names(self) -> List[str]:
+        """Keyword params a caller may pass to render. Data args the render fills in itself (e.g. sub_totals_df) default to None."""
+        if self.chart is None:
+            return [p.name for p in inspect.signature(self.render).parameters.values()
+                    if p.kind == inspect.Parameter.KEYWORD_ONLY]
+        return [p.name for p in inspect.signature(self.chart).parameters.values()
+                if p.default is not inspect.Parameter.empty and p.default is not None]
+
+
+class Table():
+    ## A table for the HTML dashboard. `build(inputs, ctx)` returns a small display-ready DataFrame from the named datasets.
+    def __init__(self, name: str, build: Callable, datasets: List[str]):
+        self.name = name
+        self.build = build
+        self.datasets = datasets
+
+
+class Caption():
+    ## Text posted with a report's image. `build(inputs, ctx)` returns a one line headline from the named
+    ### datasets (which needn't be the same ones the chart is drawn from). Captions only read datasets
+    ### the run already has (or files other runs saved, read-only), they never fetch or recompute anything themselves.
+    def __init__(self, report_name: str, build: Callable, datasets: List[str]):
+        self.report_name = report_name
+        self.build = build
+        self.datasets = datasets
+
+
+class RunContext():
+    ## Everything a node may need besides its upstream datasets
+    def __init__(self, league, week: int, season_start_date: datetime.datetime = None):
+        self.league = league
+        self.week = week
+        self.season_start_date = season_start_date
+
+    def cache_id(self) -> str:
+        return f'{self.league.league_id}-{self.league.year}-week-{self.week}'
+
+
+DATASETS = {}
+REPORTS = {} ## Insertion order is the order reports get posted
+TABLES = {}
+CAPTIONS = {} ## Report name -> Caption
+
+def register_dataset(name: str, deps: List[str] = None, max_age: datetime.timedelta = None,
+                     diff_keys: List[str] = None, diff_columns: List[str] = None, tag_along: bool = False):
+    """Decorator registering `build(ctx, inputs)` as the builder of a dataset."""
+    def decorator(build):
+        DATASETS[name] = Dataset(name, build, deps, max_age, diff_keys, diff_columns, tag_along)
+        return build
+    return decorator
+
+def register_update(name: str):
+    """Decorator registering `update(ctx, inputs, previous, changes)` as the incremental builder of a dataset.
+
+    `changes` maps each dep to its row diff (from change_detection.diff_rows), or None if it didn't change.
+    """
+    def decorator(update):
+        DATASETS[name].update = update
+        return update
+    return decorator
+
+def register_report(name: str, datasets: List[str], default: bool = True, chart: Callable = None):
+    """Decorator registering `render(inputs, ctx, **params)` as a chart that needs the given datasets and draws with `chart`."""
+    def decorator(render):
+        REPORTS[name] = Report(name, render, datasets, default, chart)
+        return render
+    return decorator
+
+
+def register_table(name: str, datasets: List[str]):
+    """Decorator registering `build(inputs, ctx)` as a dashboard table that needs the given datasets."""
+    def decorator(build):
+        TABLES[name] = Table(name, build, datasets)
+        return build
+    return decorator
+
+def register_caption(report_name: str, datasets: List[str]):
+    """Decorator registering `build(inputs, ctx)` as the caption of a report, built from the given datasets."""
+    def decorator(build):
+        CAPTIONS[report_name] = Caption(report_name, build, datasets)
+        return build
+    return decorator
+
+
+### Datasets
+## Keyed diffs, since the espn_api Player/Team objects in these never compare equal after the cache's pickle round trip
+@register_dataset('draft', max_age=datetime.timedelta(hours=12), diff_keys=['player_id'],
+                  diff_columns=['team_owner', 'overall_pick', 'position', 'points'])
+def _draft(ctx, inputs):
+    return du.get_draft_df(ctx.league, rf.get_checkpoint_path('draft-players', ctx))
+
+@register_dataset('draft_vor', deps=['draft', 'replacement'], diff_keys=['player_id'],
+                  diff_columns=['team_owner', 'overall_pick', 'position', 'points_above_replacement', 'points_above_pred'])
+def _draft_vor(ctx, inputs):
+    return du.get_draft_vor_df(inputs['draft'], inputs['replacement'])
+
+@register_dataset('draft_value', deps=['draft_vor', 'replacement'])
+def _draft_value(ctx, inputs):
+    return du.get_draft_value_by_week(inputs['draft_vor'], ctx.week, inputs['replacement'])
+
+@register_dataset('lineups', max_age=datetime.timedelta(hours=12), diff_keys=['week', 'team_name', 'player_id'],
+                  diff_columns=['position', 'slot_position', 'points'])
+def _lineups(ctx, inputs):
+    ## Each week is a separate box score request, fetch them concurrently (weeks that fail are retried on their own)
+    week_dfs, failed = rf.fetch_all(range(1, ctx.week+1), lambda wk: du.get_week_lineup_df(wk, ctx.league),
+                                    rf.get_checkpoint_path('lineup-weeks', ctx), max_workers=8)
+    if len(week_dfs) == 0:
+        raise next(iter(failed.values()))
+    lineup_df = pd.concat(week_dfs.values(), ignore_index=True)
+    if len(failed) > 0:
+        rf.mark_incomplete(lineup_df, f'lineups: weeks {sorted(failed)} failed to load')
+    return lineup_df
+
+@register_dataset('free_agents', max_age=datetime.timedelta(hours=12), diff_keys=['week', 'player_id'],
+                  diff_columns=['position', 'points'])
+def _free_agents(ctx, inputs):
+    ## Each week's free agent pool is a separate (large) request, shared by the replacement levels and the waiver wire
+    week_dfs, failed = rf.fetch_all(range(1, ctx.week+1), lambda wk: ww.get_free_agent_week_df(ctx.league, wk),
+                                    rf.get_checkpoint_path('free-agent-weeks', ctx), max_workers=4)
+    if len(week_dfs) == 0:
+        raise next(iter(failed.values()))
+    free_agents_df = pd.concat(week_dfs.values(), ignore_index=True)
+    if len(failed) > 0:
+        rf.mark_incomplete(free_agents_df, f'free agents: weeks {sorted(failed)} failed to load')
+    return free_agents_df
+
+@register_dataset('starter_counts', max_age=datetime.timedelta(hours=12))
+def _starter_counts(ctx, inputs):
+    ## Lineup slots per position (a box score request), shared by everything that solves optimal lineups
+    return du.get_starter_counts(ctx.league)
+
+@register_dataset('subs', deps=['lineups'])
+def _subs(ctx, inputs):
+    return du.get_full_sub_df(inputs['lineups'])
+
+@register_update('subs')
+def _update_subs(ctx, inputs, previous, changes):
+    ## Only re-solve the team/weeks whose lineups changed
+    if changes['lineups'] is None:
+        return previous
+    team_weeks = cd.get_changed_groups(changes['lineups'], ['team_name', 'week'])
+    changed_lineups = inputs['lineups'].merge(team_weeks, on=['team_name', 'week'])
+    kept = previous.merge(team_weeks, on=['team_name', 'week'], how='left', indicator=True)
+    kept = previous[(kept['_merge'] == 'left_only').values]
+    new_subs = du.get_full_sub_df(changed_lineups) if len(changed_lineups) > 0 else None
+    ## No changed team/week needed a sub (or they all dropped out of the lineups)
+    if new_subs is None or len(new_subs) == 0:
+        return kept.reset_index(drop=True)
+    return (pd.concat([kept, new_subs], ignore_index=True)
+            .sort_values(['team_name', 'week'], kind='stable').reset_index(drop=True))
+
+@register_dataset('sub_totals', deps=['subs'])
+def _sub_totals(ctx, inputs):
+    ## One season of subs is already in memory (the caption uses it too), so no chunking here.
+    ### du.get_sub_totals_df_chunked is for multi-season histories only.
+    return du.get_sub_totals_df(inputs['subs'])
+
+@register_dataset('replacement', deps=['lineups', 'free_agents', 'starter_counts'])
+def _replacement(ctx, inputs):
+    ## (positions x weeks) replacement levels the draft datasets are valued against
+    return rl.get_league_replacement_levels(ctx.league, inputs['lineups'], inputs['free_agents'],
+                                            inputs['starter_counts'], ctx.week)
+
+@register_dataset('perfect_manager', deps=['lineups', 'starter_counts'])
+def _perfect_manager(ctx, inputs):
+    return cf.get_league_counterfactual_standings_df(ctx.league, inputs['lineups'], inputs['starter_counts'], ctx.week)
+
+@register_dataset('wire_gains', deps=['lineups', 'free_agents', 'starter_counts'])
+def _wire_gains(ctx, inputs):
+    return ww.get_league_wire_gains_df(inputs['lineups'], inputs['free_agents'], inputs['starter_counts'], ctx.week)
+
+@register_dataset('projection_errors', deps=['lineups'])
+def _projection_errors(ctx, inputs):
+    ## Player/weeks captured earlier (by the scheduler before lock) are kept, only new ones are added
+    store_path = pj.get_projection_store_path(ctx.league)
+    pj.capture_projections(inputs['lineups'], store_path)
+    return pj.get_projection_errors_df(pj.load_projection_store(store_path), inputs['lineups'])
+
+@register_dataset('benchmarks', deps=['lineups', 'starter_counts'], tag_along=True)
+def _benchmarks(ctx, inputs):
+    ## Adds this league's weeks to the store shared by all our leagues, returns the cross-league sketches.
+    ### Only built when the lineups are loaded anyway, the caption reads the saved sketches.
+    return lb.update_benchmarks(ctx.league, inputs['lineups'], inputs['starter_counts'])
+
+@register_dataset('weekly_scores', max_age=datetime.timedelta(hours=12))
+def _weekly_scores(ctx, inputs):
+    return du.get_weekly_scores_df(ctx.week, ctx.league)
+
+@register_dataset('playoff_odds', deps=['weekly_scores'])
+def _playoff_odds(ctx, inputs):
+    return sim.get_playoff_odds_df(ctx.league, inputs['weekly_scores'], ctx.week)
+
+@register_dataset('schedule_luck', deps=['weekly_scores'])
+def _schedule_luck(ctx, inputs):
+    return sl.get_league_schedule_luck_df(ctx.league, inputs['weekly_scores'], ctx.week)
+
+@register_dataset('power_rankings', max_age=datetime.timedelta(hours=12))
+def _power_rankings(ctx, inputs):
+    return pr.update_power_rankings(ctx.league, ctx.week)
+
+@register_dataset('head_to_head', max_age=datetime.timedelta(hours=12))
+def _head_to_head(ctx, inputs):
+    return h2h.update_head_to_head(ctx.league, ctx.week)
+
+@register_dataset('activity', max_age=datetime.timedelta(hours=1))
+def _activity(ctx, inputs):
+    log_path = al.get_activity_log_path(ctx.league)
+    al.update_activity_log(ctx.league, log_path)
+    return al.load_activity_log_df(log_path)
+
+@register_dataset('trades', deps=['activity'])
+def _trades(ctx, inputs):
+    return du.get_trade_evalutions_df(ctx.league, ctx.season_start_date, activity_df=inputs['activity'],
+                                      checkpoint_path=rf.get_checkpoint_path('trade-players', ctx))
+
+
+### Reports
+@register_report('biggest_steals', ['draft_vor'], chart=viz.biggest_steals_chart)
+def _biggest_steals(inputs, ctx, **params):
+    return viz.biggest_steals_chart(inputs['draft_vor'], ctx.week, **params)
+
+@register_report('biggest_busts', ['draft_vor'], chart=viz.biggest_busts_chart)
+def _biggest_busts(inputs, ctx, **params):
+    return viz.biggest_busts_chart(inputs['draft_vor'], ctx.week, **params)
+
+@register_report('draft_value_over_time', ['draft_vor', 'draft_value'], chart=viz.draft_value_over_time_chart)
+def _draft_value_over_time(inputs, ctx, **params):
+    return viz.draft_value_over_time_chart(inputs['draft_vor'], inputs['draft_value'], ctx.week, **params)
+
+@register_report('record_vs_league', ['weekly_scores'], chart=viz.record_vs_league_chart)
+def _record_vs_league(inputs, ctx, **params):
+    return viz.record_vs_league_chart(inputs['weekly_scores'], ctx.week, **params)
+
+@register_report('luckiest_records', ['weekly_scores'], chart=viz.luckiest_records_chart)
+def _luckiest_records(inputs, ctx, **params):
+    return viz.luckiest_records_chart(inputs['weekly_scores'], ctx.week, **params)
+
+@register_report('playoff_odds', ['playoff_odds'], chart=viz.playoff_odds_chart)
+def _playoff_odds_chart(inputs, ctx, **params):
+    return viz.playoff_odds_chart(inputs['playoff_odds'], ctx.week, **params)
+
+@register_report('schedule_swap', ['schedule_luck'], chart=viz.schedule_swap_chart)
+def _schedule_swap(inputs, ctx, **params):
+    return viz.schedule_swap_chart(inputs['schedule_luck'][0], ctx.week, **params)
+
+@register_report('schedule_luck', ['schedule_luck'], chart=viz.schedule_luck_chart)
+def _schedule_luck_chart(inputs, ctx, **params):
+    return viz.schedule_luck_chart(inputs['schedule_luck'][1], ctx.week, **params)
+
+@register_report('power_rankings', ['power_rankings'], chart=viz.power_rankings_chart)
+def _power_rankings_chart(inputs, ctx, **params):
+    return viz.power_rankings_chart(inputs['power_rankings'], ctx.week, **params)
+
+@register_report('rivalries', ['head_to_head'], chart=viz.rivalry_chart)
+def _rivalries(inputs, ctx, **params):
+    return viz.rivalry_chart(inputs['head_to_head'], ctx.league.year, ctx.week, **params)
+
+@register_report('total_points_left_on_bench', ['sub_totals'], chart=viz.total_points_left_on_bench_chart)
+def _total_points_left_on_bench(inputs, ctx, **params):
+    return viz.total_points_left_on_bench_chart(None, ctx.week, sub_totals_df=inputs['sub_totals'], **params)
+
+@register_report('if_only_wouldve_started', ['sub_totals'], chart=viz.if_only_wouldve_started_chart)
+def _if_only_wouldve_started(inputs, ctx, **params):
+    return viz.if_only_wouldve_started_chart(None, ctx.week, sub_totals_df=inputs['sub_totals'], **params)
+
+@register_report('if_only_wouldve_started_owner', ['sub_totals'], chart=viz.if_only_wouldve_started_owner_chart)
+def _if_only_wouldve_started_owner(inputs, ctx, **params):
+    return viz.if_only_wouldve_started_owner_chart(None, ctx.week, sub_totals_df=inputs['sub_totals'], **params)
+
+@register_report('perfect_manager', ['perfect_manager'], chart=viz.perfect_manager_chart)
+def _perfect_manager_chart(inputs, ctx, **params):
+    return viz.perfect_manager_chart(inputs['perfect_manager'][1], ctx.week, **params)
+
+@register_report('points_left_on_wire', ['wire_gains'], chart=viz.points_left_on_wire_chart)
+def _points_left_on_wire(inputs, ctx, **params):
+    return viz.points_left_on_wire_chart(inputs['wire_gains'], ctx.week, **params)
+
+@register_report('beat_projections', ['projection_errors'], chart=viz.beat_projections_chart)
+def _beat_projections(inputs, ctx, **params):
+    return viz.beat_projections_chart(inputs['projection_errors'], ctx.week, **params)
+
+@register_report('number_of_trades', ['activity'], chart=viz.number_trades_acquisition_chart)
+def _number_of_trades(inputs, ctx, **params):
+    return viz.number_trades_acquisition_chart(inputs['activity'], 'trades', **params)
+
+@register_report('number_of_acquisitions', ['activity'], chart=viz.number_trades_acquisition_chart)
+def _number_of_acquisitions(inputs, ctx, **params):
+    return viz.number_trades_acquisition_chart(inputs['activity'], 'acquisitions', **params)
+
+## Trade evaluations are end-of-season reports (and need ctx.season_start_date), so only run when asked for
+@register_report('best_trades', ['trades'], default=False, chart=viz.best_worst_trade_chart)
+def _best_trades(inputs, ctx, **params):
+    return viz.best_worst_trade_chart(inputs['trades'], 'best', **params)
+
+@register_report('worst_trades', ['trades'], default=False, chart=viz.best_worst_trade_chart)
+def _worst_trades(inputs, ctx, **params):
+    return viz.best_worst_trade_chart(inputs['trades'], 'worst', **params)
+
+
+### Dashboard tables (only shown when their datasets were part of the run)
+@register_table('Power Rankings', ['power_rankings'])
+def _power_rankings_table(inputs, ctx):
+    current = inputs['power_rankings'][inputs['power_rankings']['week'] == ctx.week].sort_values('rank')
+    return pd.DataFrame({'Rank': current['rank'], 'Team': current['team'], 'Rating': current['rating'].round(1)})
+
+@register_table('Playoff Odds', ['playoff_odds'])
+def _playoff_odds_table(inputs, ctx):
+    odds = inputs['playoff_odds'].sort_values(['playoff_pct', 'bye_pct'], ascending=False)
+    return pd.DataFrame({'Team': odds['team'],
+                         'Playoffs': (odds['playoff_pct']*100).round(1).astype(str) + '%',
+                         'Bye': (odds['bye_pct']*100).round(1).astype(str) + '%'})
+
+@register_table('Transactions', ['activity'])
+def _transactions_table(inputs, ctx):
+    counts = al.get_transaction_counts_df(inputs['activity']).sort_values('acquisitions', ascending=False)
+    return counts[['team_owner', 'trades', 'waivers', 'acquisitions']].rename(columns=lambda x: x.replace('_', ' ').title())
+
+
+### Captions
+@register_caption('biggest_steals', ['draft_vor'])
+def _biggest_steals_caption(inputs, ctx):
+    return cap.best_steal_caption(inputs['draft_vor'])
+
+@register_caption('biggest_busts', ['draft_vor'])
+def _biggest_busts_caption(inputs, ctx):
+    return cap.biggest_bust_caption(inputs['draft_vor'])
+
+@register_caption('draft_value_over_time', ['draft_vor'])
+def _draft_value_over_time_caption(inputs, ctx):
+    return cap.best_steal_caption(inputs['draft_vor'])
+
+@register_caption('record_vs_league', ['weekly_scores'])
+def _record_vs_league_caption(inputs, ctx):
+    ## Sketches as of the last run that had the lineups, so the chart doesn't pull in box scores just for this
+    return cap.top_scorer_caption(inputs['weekly_scores'], ctx.week, lb.QuantileSketches.load(lb.get_sketch_path()))
+
+@register_caption('luckiest_records', ['weekly_scores'])
+def _luckiest_records_caption(inputs, ctx):
+    return cap.luckiest_team_caption(inputs['weekly_scores'])
+
+@register_caption('playoff_odds', ['playoff_odds'])
+def _playoff_odds_caption(inputs, ctx):
+    return cap.playoff_odds_caption(inputs['playoff_odds'])
+
+@register_caption('power_rankings', ['power_rankings'])
+def _power_rankings_caption(inputs, ctx):
+    return cap.power_rankings_caption(inputs['power_rankings'], ctx.week)
+
+@register_caption('rivalries', ['head_to_head'])
+def _rivalries_caption(inputs, ctx):
+    return cap.rivalry_week_caption(inputs['head_to_head'], ctx.league.year, ctx.week)
+
+@register_caption('total_points_left_on_bench', ['subs'])
+def _total_points_left_on_bench_caption(inputs, ctx):
+    return cap.bench_blunder_caption(inputs['subs'], ctx.week)
+
+@register_caption('if_only_wouldve_started', ['sub_totals'])
+def _if_only_wouldve_started_caption(inputs, ctx):
+    return cap.most_points_on_bench_caption(inputs['sub_totals'])
+
+@register_caption('perfect_manager', ['perfect_manager'])
+def _perfect_manager_caption(inputs, ctx):
+    return cap.perfect_manager_caption(inputs['perfect_manager'][1])
+
+@register_caption('points_left_on_wire', ['wire_gains'])
+def _points_left_on_wire_caption(inputs, ctx):
+    return cap.wire_caption(inputs['wire_gains'])
+
+@register_caption('beat_projections', ['projection_errors'])
+def _beat_projections_caption(inputs, ctx):
+    return cap.beat_projections_caption(inputs['projection_errors'])
+
+@register_caption('number_of_trades', ['activity'])
+def _number_of_trades_caption(inputs, ctx):
+    return cap.transactions_caption(inputs['activity'], 'trades')
+
+@register_caption('number_of_acquisitions', ['activity'])
+def _number_of_acquisitions_caption(inputs, ctx):
+    return cap.transactions_caption(inputs['activity'], 'acquisitions')
+
+
+### DAG
+def get_default_reports() -> list:
+    return [name for name, report in REPORTS.items() if report.default]
+
+def get_required_datasets(report_names: List[str]) -> list:
+    """
+    The minimal set of datasets needed for the reports (and their captions), in dependency (topological) order,
+    plus the tag_along datasets whose deps are all needed anyway.
+
+    Args:
+        report_names (List[str]): Names of registered reports
+
+    Returns:
+        list: Dataset names, each listed after all of its deps
+    """
+    ordered = []
+    def visit(name):
+        if name in ordered:
+            return
+        for dep in DATASETS[name].deps:
+            visit(dep)
+        ordered.append(name)
+    for report_name in report_names:
+        caption = CAPTIONS.get(report_name)
+        for name in REPORTS[report_name].datasets + (caption.datasets if caption else []):
+            visit(name)
+    for name, dataset in DATASETS.items():
+        if dataset.tag_along and name not in ordered and all(dep in ordered for dep in dataset.deps):
+            ordered.append(name)
+    return ordered
+
+def node_key(node_name: str, ctx: RunContext, upstream_versions: List[str]) -> str:
+    """Cache key of a node: changes whenever the run context or any upstream dataset version changes."""
+    raw = json.dumps([node_name, ctx.cache_id(), str(ctx.season_start_date), upstream_versions])
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+### Cache
+def _dataset_cache_path(name: str, ctx: RunContext) -> str:
+    return os.path.join(DATASET_CACHE_DIR, f'{name}-{ctx.cache_id()}.pkl')
+
+def _load_cache_entry(name: str, ctx: RunContext):
+    path = _dataset_cache_path(name, ctx)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def load_cached_dataset(name: str, ctx: RunContext, key: str):
+    """
+    Load a dataset from the cache if it was built with the same key and hasn't expired.
+
+    Returns:
+        tuple: (version, value), or None if there's no valid cached copy
+    """
+    cached = _load_cache_entry(name, ctx)
+    if cached is None:
+        return None
+    max_age = DATASETS[name].max_age
+    if cached['key'] != key or (max_age is not None and time.time() - cached['built_at'] > max_age.total_seconds()):
+        return None
+    return cached['version'], cached['value']
+
+def save_cached_dataset(name: str, ctx: RunContext, key: str, value, version: str = None,
+                        upstream: dict = None) -> str:
+    """Cache a freshly built dataset and return its version id (a new one unless `version` is given)."""
+    version = version or hashlib.sha1(f'{key}-{time.time()}'.encode()).hexdigest()
+    os.makedirs(DATASET_CACHE_DIR, exist_ok=True)
+    with open(_dataset_cache_path(name, ctx), 'wb') as f:
+        pickle.dump({'key': key, 'version': version, 'built_at': time.time(), 'value': value,
+                     'upstream': upstream or {}}, f)
+    return version
+
+def build_dataset(name: str, ctx: RunContext, upstream: dict, use_cache: bool = True) -> tuple:
+    """
+    Load a dataset from the cache, or rebuild it and work out what changed since the stored copy.
+
+    A rebuilt dataset that's identical to the stored copy keeps its old version, so nothing downstream
+    of it is recomputed or re-rendered. A dataset built from partial results (resilient_fetch.mark_incomplete)
+    is stored but not valid, so the next run rebuilds it (resuming its fetch checkpoints). A dataset with an `update` is patched from its deps' row diffs
+    when the stored copy was built from exactly the versions those diffs start from.
+
+    Args:
+        name (str): Dataset name
+        ctx (RunContext): Run context
+        upstream (dict): Each dep's (version, value, change) as returned by build_dataset
+        use_cache (bool, optional): Use a still valid cached copy. Defaults to True.
+
+    Returns:
+        tuple: (version, value, change), change being (previous version, row diff) if the dataset was
+               rebuilt with row keys on top of a stored copy, else None
+    """
+    node = DATASETS[name]
+    versions = {dep: upstream[dep][0] for dep in node.deps}
+    key = node_key(name, ctx, list(versions.values()))
+    if use_cache:
+        cached = load_cached_dataset(name, ctx, key)
+        if cached is not None:
+            return cached[0], cached[1], None
+
+    inputs = {dep: upstream[dep][1] for dep in node.deps}
+    previous = _load_cache_entry(name, ctx)
+    value = None
+    if previous is not None and node.update is not None:
+        changes = {}
+        for dep in node.deps:
+            dep_version, _, dep_change = upstream[dep]
+            seen_version = previous['upstream'].get(dep)
+            if dep_version == seen_version:
+                changes[dep] = None
+            elif dep_change is not None and dep_change[0] == seen_version:
+                changes[dep] = dep_change[1]
+            else:
+                break
+        else:
+            value = node.update(ctx, inputs, previous['value'], changes)
+    if value is None:
+        value = node.build(ctx, inputs)
+    if len(rf.get_incomplete(value)) > 0:
+        key = None
+
+    if previous is None:
+        return save_cached_dataset(name, ctx, key, value, upstream=versions), value, None
+    change = None
+    if node.diff_keys is not None:
+        diff = cd.diff_rows(previous['value'], value, node.diff_keys, node.diff_columns)
+        change = previous['version'], diff
+        unchanged = len(diff) == 0
+    else:
+        unchanged = cd.values_equal(previous['value'], value)
+    version = save_cached_dataset(name, ctx, key, value, previous['version'] if unchanged else None, versions)
+    return version, value, change
+
+def invalidate_cached_datasets(names: List[str], ctx: RunContext):
+    """Force the datasets to be rebuilt on the next run. The stored copies are kept to diff the rebuilt ones against."""
+    for name in names:
+        cached = _load_cache_entry(name, ctx)
+        if cached is not None:
+            with open(_dataset_cache_path(name, ctx), 'wb') as f:
+                pickle.dump({**cached, 'key': None}, f)
+
+def _report_stamp_path(name: str, ctx: RunContext) -> str:
+    return os.path.join(REPORT_CACHE_DIR, f'{name}-{ctx.cache_id()}.json')
+
+def load_cached_report(name: str, ctx: RunContext, key: str):
+    """Path of the already-rendered image if it was drawn from the same dataset versions, else None."""
+    stamp_path = _report_stamp_path(name, ctx)
+    if not os.path.exists(stamp_path):
+        return None
+    with open(stamp_path) as f:
+        stamp = json.load(f)
+    if stamp['key'] != key or not os.path.exists(stamp['path']):
+        return None
+    return stamp['path']
+
+def save_cached_report(name: str, ctx: RunContext, key: str, path: str):
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    with open(_report_stamp_path(name, ctx), 'w') as f:
+        json.dump({'key': key, 'path': path}, f)
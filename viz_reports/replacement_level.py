@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from espn_api.football import League
+
+import data_utils as du
+import waiver_wire as ww
+
+## Replacement level = avg. of the best `REPLACEMENT_WINDOW` players at a position who wouldn't start for anyone that week
+REPLACEMENT_WINDOW = 3
+
+class ReplacementLevels():
+    ## Replacement-level points for every (position, week) as a dense (positions x weeks) array, weeks 1..N,
+    ### so value over replacement for any set of players is one gather and a subtraction.
+    def __init__(self, positions: list, levels: np.ndarray):
+        self.positions = positions
+        self.levels = levels
+        self.weeks = list(range(1, levels.shape[1]+1))
+        self._pos_idx = {pos: i for i, pos in enumerate(positions)}
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, ReplacementLevels) and self.positions == other.positions and
+                self.levels.shape == other.levels.shape and bool(np.array_equal(self.levels, other.levels)))
+
+    def get(self, positions) -> np.ndarray:
+        """(len(positions) x weeks) replacement levels for each player's position (0 for positions not in the pool)."""
+        idx = np.array([self._pos_idx.get(pos, -1) for pos in positions], dtype = int)
+        padded = np.vstack([self.levels, np.zeros((1, self.levels.shape[1]))])
+        return padded[idx]
+
+    def value_over_replacement(self, positions, points: np.ndarray) -> np.ndarray:
+        """
+        Points over replacement each week for a set of players.
+
+        Args:
+            positions (list-like): Position of each player
+            points (np.ndarray): (players x weeks) points for weeks 1..n, e.g. from data_utils.get_weekly_points_matrix
+                (n can't be more than the weeks in the table)
+
+        Returns:
+            np.ndarray: Same shape as points
+        """
+        return points - self.get(positions)[:, :points.shape[1]]
+
+    def to_df(self) -> pd.DataFrame:
+        """Positions x weeks table of the replacement levels."""
+        return pd.DataFrame(self.levels, index = pd.Index(self.positions, name = 'position'),
+                            columns = pd.Index(self.weeks, name = 'week'))
+
+
+def get_replacement_levels(pool_df: pd.DataFrame, starter_counts: dict, n_teams: int,
+                           window: int = REPLACEMENT_WINDOW) -> ReplacementLevels:
+    """
+    Replacement level of every position/week from the whole player pool.
+
+    Every team's starting slots are filled league-wide with the same greedy fill as optimal lineups
+    (single positions first, then flexes), so e.g. with a RB/WR/TE flex the cutoff at each of those positions
+    depends on how the flex starters split between them that week. A position's replacement level is then the
+    avg. points of the next `window` best players after its starters.
+
+    Args:
+        pool_df (pd.DataFrame): Every rostered and free agent player each week, with 'week', 'position' and 'points'
+        starter_counts (dict): From data_utils.get_starter_counts
+        n_teams (int): Teams in the league
+        window (int, optional): Players averaged for the replacement level. Defaults to REPLACEMENT_WINDOW.
+
+    Returns:
+        ReplacementLevels: (positions x weeks) table for weeks 1 through the last week in the pool
+    """
+    keys = ['week', 'position']
+    df = pool_df[keys + ['points']].copy()
+    single_counts, flexes = du.get_lineup_slots(starter_counts)
+
+    df['pos_rank'] = df.groupby(keys)['points'].rank(method = 'first', ascending = False)
+    df['selected'] = df['pos_rank'] <= df['position'].map(single_counts).fillna(0)*n_teams
+    for flex_positions, n in flexes:
+        eligible = df[~df['selected'] & df['position'].isin(flex_positions)]
+        flex_rank = eligible.groupby('week')['points'].rank(method = 'first', ascending = False)
+        df.loc[flex_rank[flex_rank <= n*n_teams].index, 'selected'] = True
+
+    ## Starters are always the top ranks at their position, so the next best are the ranks right after them
+    n_starters = df.groupby(keys)['selected'].transform('sum')
+    in_window = (df['pos_rank'] > n_starters) & (df['pos_rank'] <= n_starters + window)
+    levels = df[in_window].groupby(keys)['points'].mean().unstack('week')
+
+    weeks = range(1, int(pool_df['week'].max())+1)
+    levels = levels.reindex(columns = weeks).fillna(0)
+    return ReplacementLevels(list(levels.index), levels.to_numpy())
+
+def get_player_pool_df(lineup_df: pd.DataFrame, free_agents_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Every player available each week: everyone on a roster (from the lineups) plus the free agents.
+
+    Args:
+        lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
+        free_agents_df (pd.DataFrame): Free agents of every week (waiver_wire.get_free_agent_week_df rows)
+
+    Returns:
+        pd.DataFrame: One row per player/week with 'week', 'player_id', 'player_name', 'position' and 'points'
+    """
+    rostered = lineup_df[ww.FREE_AGENT_COLUMNS]
+    ## ESPN's free agent list is who's available now, drop anyone who was on a roster that week
+    ### (by id, players can share a name)
+    return (pd.concat([rostered, free_agents_df[ww.FREE_AGENT_COLUMNS]], ignore_index = True)
+            .drop_duplicates(['week', 'player_id']))
+
+def get_league_replacement_levels(league: League, lineup_df: pd.DataFrame, free_agents_df: pd.DataFrame,
+                                  starter_counts: dict, week: int) -> ReplacementLevels:
+    """get_replacement_levels for weeks 1 through `week`, with the same free agent pools as the waiver wire analysis."""
+    pool_df = get_player_pool_df(lineup_df[lineup_df['week'] <= week], free_agents_df[free_agents_df['week'] <= week])
+    return get_replacement_levels(pool_df, starter_counts, len(league.teams))
@@ -0,0 +1,156 @@
+import json
+import time
+import threading
+import matplotlib
+matplotlib.use('Agg') ## Charts are drawn on request handler threads
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from espn_api.football import League
+
+import registry as rg
+import transport as tr
+
+def _parse_param(value: str):
+    """Query string values come in as text, chart kwargs are mostly numbers."""
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+class WarmReportStore():
+    ## Keeps datasets and rendered images for one league in memory, so repeat requests skip ESPN and
+    ### matplotlib entirely. Datasets are built the same way as in the pipeline (registry nodes, on-disk
+    ### cache) the first time they're needed for a week, then served from memory until the next refresh.
+    ### A refresh builds a whole new set off to the side and swaps it in, so requests for loaded data never wait on it.
+    def __init__(self, league: League, default_week: int, season_start_date=None):
+        self.league = league
+        self.default_week = default_week
+        self.season_start_date = season_start_date
+        self.datasets = {} ## (name, week) -> (version, value, change)
+        self.images = {} ## (report, week, params) -> png bytes
+        ## Builds share the on-disk dataset cache, so one runs at a time (lookups of loaded data don't take it)
+        self.build_lock = threading.RLock()
+        ## Charts share template figures and rcParams, so one chart is drawn at a time
+        self.render_lock = threading.Lock()
+        self.refreshed_at = time.time()
+
+    def _build_dataset(self, datasets: dict, name: str, week: int, use_disk_cache: bool):
+        key = (name, week)
+        if key not in datasets:
+            ctx = rg.RunContext(self.league, week, self.season_start_date)
+            upstream = {dep: self._build_dataset(datasets, dep, week, use_disk_cache) for dep in rg.DATASETS[name].deps}
+            datasets[key] = rg.build_dataset(name, ctx, upstream, use_disk_cache)
+        return datasets[key]
+
+    def get_dataset(self, name: str, week: int, use_disk_cache: bool = True):
+        datasets = self.datasets
+        if (name, week) in datasets:
+            return datasets[(name, week)]
+        with self.build_lock:
+            return self._build_dataset(self.datasets, name, week, use_disk_cache)
+
+    def get_image(self, report_name: str, week: int, params: dict) -> bytes:
+        """PNG bytes of the report for the week and chart params, rendered only the first time."""
+        ## Taken before the datasets, so an image drawn from data a refresh has since replaced is dropped with it
+        images = self.images
+        key = (report_name, week, tuple(sorted(params.items())))
+        if key in images:
+            return images[key]
+        report = rg.REPORTS[report_name]
+        inputs = {name: self.get_dataset(name, week)[1] for name in report.datasets}
+        ctx = rg.RunContext(self.league, week, self.season_start_date)
+        ## Every param variant of a report writes the same file, so read it back before the next chart can overwrite it
+        with self.render_lock:
+            path = report.render(inputs, ctx, **params)
+            with open(path, 'rb') as f:
+                images[key] = f.read()
+        return images[key]
+
+    def refresh(self, use_disk_cache: bool = False):
+        """Re-warm the default week's datasets from ESPN, then swap them in (dropping everything else held in memory)."""
+        datasets = {}
+        with self.build_lock:
+            for name in rg.get_required_datasets(rg.get_default_reports()):
+                self._build_dataset(datasets, name, self.default_week, use_disk_cache)
+            ## Datasets first, so get_image never pairs the new images dict with old datasets
+            self.datasets = datasets
+            self.images = {}
+        self.refreshed_at = time.time()
+
+
+def make_handler(store: WarmReportStore):
+    """
+    Request handler for the report server.
+
+    Endpoints:
+        GET /reports                       -> JSON list of report names
+        GET /metrics                       -> JSON totals of the ESPN requests made so far
+        GET /charts/<report>.png?week=N&.. -> chart image, other query params are passed to the chart (400 if it has no such param)
+    """
+    class ReportHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == '/reports':
+                return self._send(200, json.dumps(list(rg.REPORTS)).encode(), 'application/json')
+            if url.path == '/metrics':
+                return self._send(200, json.dumps(tr.get_transport().metrics.summary()).encode(), 'application/json')
+            if url.path.startswith('/charts/') and url.path.endswith('.png'):
+                report_name = url.path[len('/charts/'):-len('.png')]
+                if report_name not in rg.REPORTS:
+                    return self._send(404, f'Unknown report {report_name}'.encode(), 'text/plain')
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                week = query.pop('week', str(store.default_week))
+                if not week.isdigit() or int(week) < 1:
+                    return self._send(400, f'week must be a week number, got {week!r}'.encode(), 'text/plain')
+                week = int(week)
+                unknown = sorted(set(query) - set(rg.REPORTS[report_name].param_names()))
+                if len(unknown) > 0:
+                    return self._send(400, f'Unknown params for {report_name}: {", ".join(unknown)}'.encode(), 'text/plain')
+                params = {k: _parse_param(v) for k, v in query.items()}
+                try:
+                    image = store.get_image(report_name, week, params)
+                except Exception as e:
+                    ## Bad param values the chart can't use, ESPN errors, weeks with no data, ...
+                    return self._send(500, f'{type(e).__name__}: {e}'.encode(), 'text/plain')
+                return self._send(200, image, 'image/png')
+            return self._send(404, b'Not found', 'text/plain')
+
+    return ReportHandler
+
+def serve_reports(league: League, week: int, port: int = 8000, refresh_minutes: int = 60,
+                  season_start_date=None):
+    """
+    Run the report server until interrupted, refreshing the in-memory data every refresh_minutes.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection (logged in once, reused for every request)
+        week (int): Default week for requests without ?week=
+        port (int, optional): Port to listen on. Defaults to 8000.
+        refresh_minutes (int, optional): Minutes between data refreshes. Defaults to 60.
+        season_start_date (datetime.datetime, optional): Needed by the trade reports. Defaults to None.
+    """
+    store = WarmReportStore(league, week, season_start_date)
+
+    def refresh_loop():
+        ## Start from whatever is still valid on disk, then pull fresh data on every refresh after
+        store.refresh(use_disk_cache=True)
+        while True:
+            time.sleep(refresh_minutes*60)
+            store.refresh()
+    threading.Thread(target=refresh_loop, daemon=True).start()
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(store))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,197 @@
+import os
+import re
+import time
+import pickle
+import threading
+import requests
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from espn_api.requests.espn_requests import ESPNUnknownError
+from typing import Callable, Hashable, Iterable
+
+FETCH_CHECKPOINT_DIR = 'data/cache/fetch'
+## Errors a retry can fix: connection errors, timeouts, unreadable responses and ESPN's non-200 statuses.
+### Anything else (e.g. a KeyError building a Player from the response) would fail the same way every time.
+RETRYABLE_ERRORS = (requests.exceptions.RequestException, ESPNUnknownError)
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker():
+    ## Stops calling a service that keeps failing. After `max_failures` failures in a row the circuit opens and
+    ### every call fails immediately for `cooldown` seconds, then calls are let through again on probation
+    ### (a success closes the circuit, the first failure re-opens it). Shared by everything that calls ESPN, so an
+    ### outage fails the rest of the run fast instead of burning every entity's retries.
+    def __init__(self, max_failures: int = 5, cooldown: float = 60.0):
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.time() - self.opened_at >= self.cooldown:
+                ## Half-open: let calls through, the next failure re-opens right away
+                self.opened_at = None
+                self.failures = self.max_failures - 1
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.max_failures:
+                self.opened_at = time.time()
+
+ESPN_BREAKER = CircuitBreaker()
+
+
+class FetchCheckpoint():
+    ## Results of a fetch stage, appended to disk one record at a time as they complete, so a run that dies
+    ### part way (or gives up on some entities) leaves everything it already fetched for the next run.
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def load(self) -> dict:
+        """Every (key, value) saved so far. A record cut off by a crash mid-write is ignored."""
+        results = {}
+        if not os.path.exists(self.path):
+            return results
+        with open(self.path, 'rb') as f:
+            while True:
+                try:
+                    key, value = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError):
+                    break
+                results[key] = value
+        return results
+
+    def save(self, key: Hashable, value):
+        record = pickle.dumps((key, value))
+        with self.lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(record)
+
+    def clear(self):
+        with self.lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def get_checkpoint_path(stage: str, ctx) -> str:
+    """Checkpoint file of a fetch stage (e.g. 'draft-players') for a run context."""
+    return os.path.join(FETCH_CHECKPOINT_DIR, f'{stage}-{ctx.cache_id()}.pkl')
+
+def clear_stale_checkpoints(ctx) -> list:
+    """
+    Delete the fetch checkpoints left by earlier weeks of the run context's league/season. Only the latest
+    week's runs are resumed, so anything an earlier week couldn't finish is never read again.
+
+    Returns:
+        list: Paths deleted
+    """
+    if not os.path.isdir(FETCH_CHECKPOINT_DIR):
+        return []
+    pattern = re.compile(rf'.+-{ctx.league.league_id}-{ctx.league.year}-week-(\d+)\.pkl$')
+    stale = []
+    for file_name in os.listdir(FETCH_CHECKPOINT_DIR):
+        match = pattern.match(file_name)
+        if match and int(match.group(1)) < ctx.week:
+            stale.append(os.path.join(FETCH_CHECKPOINT_DIR, file_name))
+    for path in stale:
+        os.remove(path)
+    return stale
+
+def fetch_all(keys: Iterable[Hashable], fetch: Callable, checkpoint_path: str = None, max_attempts: int = 3,
+              backoff: float = 1.0, breaker: CircuitBreaker = ESPN_BREAKER, max_workers: int = 1,
+              retry_on: tuple = RETRYABLE_ERRORS) -> tuple:
+    """
+    Fetch every key, retrying each one on its own and keeping whatever succeeds.
+
+    Only request/HTTP errors (`retry_on`) are retried and counted by the circuit breaker. Any other error
+    fails its key right away, since it would happen again on a retry and says nothing about ESPN being down.
+
+    Keys already in the checkpoint aren't fetched again. Once every key has been fetched the checkpoint is
+    deleted (the next run starts fresh); if some keys failed it's kept, so a rerun only fetches those.
+
+    Args:
+        keys (Iterable[Hashable]): Entities to fetch (player ids, week numbers, ...)
+        fetch (Callable): Function of one key returning its value, raising on failure
+        checkpoint_path (str, optional): Where finished results are saved. Defaults to None (no checkpoint).
+        max_attempts (int, optional): Retry budget of each key. Defaults to 3.
+        backoff (float, optional): Seconds before the first retry, doubling after each. Defaults to 1.0.
+        breaker (CircuitBreaker, optional): Circuit breaker to go through. Defaults to ESPN_BREAKER.
+        max_workers (int, optional): Keys fetched at once. Defaults to 1.
+        retry_on (tuple, optional): Exception types worth retrying. Defaults to RETRYABLE_ERRORS.
+
+    Returns:
+        tuple: (results, failed), dicts of key -> value and key -> last error for keys that used up their retries,
+               hit an error that isn't retried or were skipped by an open circuit
+    """
+    keys = list(dict.fromkeys(keys))
+    checkpoint = FetchCheckpoint(checkpoint_path) if checkpoint_path is not None else None
+    done = checkpoint.load() if checkpoint is not None else {}
+    results = {key: done[key] for key in keys if key in done}
+    failed = {}
+
+    def fetch_one(key):
+        for attempt in range(max_attempts):
+            if not breaker.allow():
+                failed[key] = CircuitOpenError('Too many failures in a row, stopped calling ESPN')
+                return
+            try:
+                value = fetch(key)
+            except retry_on as e:
+                breaker.record_failure()
+                failed[key] = e
+                if attempt < max_attempts - 1:
+                    time.sleep(backoff * 2**attempt)
+                continue
+            except Exception as e:
+                failed[key] = e
+                return
+            breaker.record_success()
+            failed.pop(key, None)
+            results[key] = value
+            if checkpoint is not None:
+                checkpoint.save(key, value)
+            return
+
+    todo = [key for key in keys if key not in results]
+    if max_workers > 1 and len(todo) > 1:
+        with ThreadPoolExecutor(max_workers) as pool:
+            list(pool.map(fetch_one, todo))
+    else:
+        for key in todo:
+            fetch_one(key)
+
+    if checkpoint is not None and len(failed) == 0:
+        checkpoint.clear()
+    return {key: results[key] for key in keys if key in results}, failed
+
+
+### Flagging partial results
+def mark_incomplete(df: pd.DataFrame, note: str) -> pd.DataFrame:
+    """Flag a dataset built from partial results, e.g. 'draft: 3 players failed to load'. Kept through the cache."""
+    df.attrs['incomplete'] = df.attrs.get('incomplete', []) + [note]
+    return df
+
+def get_incomplete(value) -> list:
+    """Notes left by mark_incomplete ([] for complete datasets and for non-DataFrames)."""
+    if isinstance(value, pd.DataFrame):
+        return value.attrs.get('incomplete', [])
+    return []
+
+def describe_failures(what: str, failed: dict) -> str:
+    return f"{len(failed)} {what} failed to load ({type(next(iter(failed.values()))).__name__})"
@@ -0,0 +1,128 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from espn_api.football import League
+
+import simulation as sim
+
+## Results keyed by a hash of the score matrix/schedule, so every chart (and rerun in the same process)
+### that asks for the same analysis reuses it
+_cache = {}
+
+def _cache_key(*arrays, **params) -> str:
+    h = hashlib.sha1()
+    for array in arrays:
+        h.update(np.ascontiguousarray(array).tobytes())
+    h.update(repr(sorted(params.items())).encode())
+    return h.hexdigest()
+
+def get_score_matrix(weekly_scores_df: pd.DataFrame, team_names: list) -> np.ndarray:
+    """(weeks x teams) array of scores from data_utils.get_weekly_scores_df, columns in team_names order."""
+    return (weekly_scores_df.pivot(index = 'week', columns = 'team', values = 'score')
+            .sort_index()[team_names].to_numpy())
+
+def get_schedule_swap_wins(scores: np.ndarray, opponents: np.ndarray) -> np.ndarray:
+    """
+    Wins for every team under every other team's schedule.
+
+    When team i takes team j's schedule and j's opponent that week was i itself, i plays j instead.
+
+    Args:
+        scores (np.ndarray): (weeks x teams) score matrix
+        opponents (np.ndarray): (weeks x teams) opponent indexes for the weeks played
+
+    Returns:
+        np.ndarray: (teams x teams) array, entry [i, j] is team i's wins with team j's schedule (ties count 0.5)
+    """
+    key = _cache_key(scores, opponents, kind='swap')
+    if key in _cache:
+        return _cache[key]
+
+    n_weeks, n_teams = scores.shape
+    team_idx = np.arange(n_teams)
+    ## (weeks, i, j): who team i plays with team j's schedule
+    swap_opp = np.broadcast_to(opponents[:, None, :], (n_weeks, n_teams, n_teams))
+    swap_opp = np.where(swap_opp == team_idx[None, :, None], team_idx[None, None, :], swap_opp)
+    own = scores[:, :, None]
+    opp = np.take_along_axis(scores[:, None, :].repeat(n_teams, axis=1), swap_opp, axis=2)
+    wins = (own > opp).sum(axis=0) + 0.5*(own == opp).sum(axis=0)
+
+    _cache[key] = wins
+    return wins
+
+def get_random_schedule_wins(scores: np.ndarray, n_schedules: int = 10_000, seed: int = 0) -> np.ndarray:
+    """
+    Wins for every team under many random schedules (a random pairing of the teams every week).
+
+    Args:
+        scores (np.ndarray): (weeks x teams) score matrix, with an even number of teams
+        n_schedules (int, optional): Number of random schedules. Defaults to 10,000.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        np.ndarray: (schedules x teams) array of wins (ties count 0.5)
+    """
+    n_weeks, n_teams = scores.shape
+    ## Every team is paired off every week, there's no bye to give the odd team out
+    if n_teams % 2 == 1:
+        raise ValueError(f"Random schedules need an even number of teams, the league has {n_teams}.")
+    key = _cache_key(scores, kind='random', n_schedules=n_schedules, seed=seed)
+    if key in _cache:
+        return _cache[key]
+
+    rng = np.random.default_rng(seed)
+    ## A random permutation per schedule/week, paired off as (perm[0], perm[1]), (perm[2], perm[3]), ...
+    perms = np.argsort(rng.random((n_schedules, n_weeks, n_teams)), axis=2)
+    partners = perms.reshape(n_schedules, n_weeks, n_teams//2, 2)[..., ::-1].reshape(perms.shape)
+    opponents = np.empty_like(perms)
+    np.put_along_axis(opponents, perms, partners, axis=2)
+
+    own = np.broadcast_to(scores, opponents.shape)
+    opp = np.take_along_axis(own, opponents, axis=2)
+    wins = (own > opp).sum(axis=1) + 0.5*(own == opp).sum(axis=1)
+
+    _cache[key] = wins
+    return wins
+
+def get_schedule_luck_df(weekly_scores_df: pd.DataFrame, opponents: np.ndarray, team_names: list,
+                         n_schedules: int = 10_000, seed: int = 0) -> tuple:
+    """
+    Schedule swap table and random schedule record distributions.
+
+    Args:
+        weekly_scores_df (pd.DataFrame): DataFrame of records/scores by week by team
+        opponents (np.ndarray): (weeks x teams) opponent indexes for the weeks played
+        team_names (list): Team names in the same order as `opponents`
+        n_schedules (int, optional): Number of random schedules. Defaults to 10,000.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        tuple: (swap_df, distribution_df). swap_df is teams x schedules of wins. distribution_df has
+               each team's actual wins, mean/percentiles of wins over random schedules, the share of
+               schedules where they'd do at least as well, and 'wins_<n>' probabilities.
+    """
+    scores = get_score_matrix(weekly_scores_df, team_names)
+    swap_wins = get_schedule_swap_wins(scores, opponents)
+    swap_df = pd.DataFrame(swap_wins, index = pd.Index(team_names, name = 'team'), columns = team_names)
+
+    random_wins = get_random_schedule_wins(scores, n_schedules, seed)
+    actual_wins = np.diag(swap_wins)
+    n_weeks = scores.shape[0]
+    ## Half wins (ties) round up into the next bucket
+    win_counts = np.stack([np.bincount(np.ceil(random_wins[:, t]).astype(int), minlength = n_weeks+1)
+                           for t in range(len(team_names))]) / n_schedules
+    distribution_df = pd.DataFrame({'team': team_names,
+                                    'actual_wins': actual_wins,
+                                    'mean_wins': random_wins.mean(axis = 0),
+                                    'p10_wins': np.percentile(random_wins, 10, axis = 0),
+                                    'p90_wins': np.percentile(random_wins, 90, axis = 0),
+                                    'pct_schedules_as_good': (random_wins >= actual_wins).mean(axis = 0)})
+    distribution_df = pd.concat([distribution_df,
+                                 pd.DataFrame(win_counts, columns = [f'wins_{i}' for i in range(n_weeks+1)])], axis = 1)
+    return swap_df, distribution_df
+
+def get_league_schedule_luck_df(league: League, weekly_scores_df: pd.DataFrame, week: int, **kwargs) -> tuple:
+    """get_schedule_luck_df for the league's actual schedule through `week`."""
+    team_names = [team.team_name for team in league.teams]
+    opponents = sim.get_schedule_matrix(league, team_names, 1, week)
+    return get_schedule_luck_df(weekly_scores_df[weekly_scores_df['week'] <= week], opponents, team_names, **kwargs)
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import asyncio
+import datetime
+from espn_api.football import League
+from typing import Callable
+
+import registry as rg
+import pipeline
+import power_rankings as pr
+import head_to_head as h2h
+import projections as pj
+
+SCHEDULER_DIR = 'data/cache'
+## Root datasets built from matchup/box scores or player point totals, i.e. the ones a stat correction can change
+SCORE_DATASETS = ['lineups', 'weekly_scores', 'power_rankings', 'head_to_head', 'draft']
+## Poll often while waiting for a week to go final, rarely while only watching for stat corrections
+WAITING_POLL = datetime.timedelta(minutes=30)
+CORRECTION_POLL = datetime.timedelta(hours=6)
+NEXT_WEEK_AFTER = datetime.timedelta(days=6)
+## Re-runs of a week posted from partial data before giving up on it (about a day of WAITING_POLL ticks)
+MAX_RESUME_ATTEMPTS = 48
+
+def get_scheduler_state_path(league: League) -> str:
+    return os.path.join(SCHEDULER_DIR, f'scheduler-{league.league_id}-{league.year}.json')
+
+def load_scheduler_state(path: str) -> dict:
+    if not os.path.exists(path):
+        return {'last_posted_week': None, 'scores': {}}
+    with open(path) as f:
+        return json.load(f)
+
+def save_scheduler_state(state: dict, path: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(state, f)
+
+def get_scoreboard_snapshot(league: League) -> dict:
+    """
+    Final matchup scores for every week of the season, from a single request for the small
+    matchup score view (no box scores or player stats).
+
+    A week counts as final once ESPN has decided every matchup in it, which happens when the
+    scoring period is processed (the morning after the last game).
+
+    Returns:
+        dict: Week number (as str, to round-trip through json) to {matchup id: [home score, away score]},
+              only for weeks that are final
+    """
+    data = league.espn_request.league_get(params={'view': 'mMatchupScore'})
+    ## The scheduler's League lives all season, keep its current week (which box_scores is clamped to) in step
+    if 'scoringPeriodId' in data:
+        league.current_week = min(data['scoringPeriodId'], data['status']['finalScoringPeriod'])
+    weeks = {}
+    for m in data['schedule']:
+        week = weeks.setdefault(str(m['matchupPeriodId']), {'final': True, 'scores': {}})
+        week['final'] &= m.get('winner', 'UNDECIDED') != 'UNDECIDED'
+        week['scores'][str(m['id'])] = [m['home']['totalPoints'], m.get('away', {}).get('totalPoints', 0)]
+    return {wk: week['scores'] for wk, week in weeks.items() if week['final']}
+
+def needs_resume(state: dict) -> bool:
+    """Whether the last posted week has charts drawn from partial data that are still worth another run."""
+    return (bool(state.get('last_posted_week')) and state.get('resume_attempts', 0) < MAX_RESUME_ATTEMPTS and
+            len(pipeline.get_incomplete_reports(state['last_posted_week'])) > 0)
+
+def diff_snapshots(old: dict, new: dict) -> tuple:
+    """
+    Compare two scoreboard snapshots.
+
+    Returns:
+        tuple: (weeks that went final since the old snapshot, final weeks whose scores changed), both sorted ints
+    """
+    newly_final = sorted(int(wk) for wk in new if wk not in old)
+    corrected = sorted(int(wk) for wk in new if wk in old and new[wk] != old[wk])
+    return newly_final, corrected
+
+def apply_stat_corrections(league: League, report_week: int, first_corrected_week: int, season_start_date=None):
+    """
+    Invalidate only what a score change can reach: the score-based root datasets of the report week
+    (their dependents and charts follow from the new versions), and the persisted Elo and head-to-head
+    state from the first corrected week on, so those weeks are re-applied instead of rebuilding the season.
+    """
+    ctx = rg.RunContext(league, report_week, season_start_date)
+    rg.invalidate_cached_datasets(SCORE_DATASETS, ctx)
+
+    ratings_path = pr.get_ratings_path(league)
+    pr.save_rating_state(pr.rewind_rating_state(pr.load_rating_state(ratings_path), first_corrected_week), ratings_path)
+
+    h2h_path = h2h.get_h2h_path(league)
+    index = h2h.HeadToHeadIndex.load(h2h_path)
+    index.drop_weeks_from(league.year, first_corrected_week)
+    index.save(h2h_path)
+
+def capture_upcoming_projections(league: League, snapshot: dict) -> int:
+    """
+    Snapshot projections for the week after the last final one, once ESPN has opened it. Run on every
+    tick, so players picked up during the week are captured too, until the week goes final.
+
+    Returns:
+        int: Number of player projections captured (see projections.capture_projections)
+    """
+    week = max([int(wk) for wk in snapshot], default=0) + 1
+    if week > league.current_week:
+        return 0
+    return pj.capture_week_projections(league, week)
+
+def poll_once(league: League, state: dict, post: Callable = None, season_start_date=None) -> dict:
+    """
+    One scheduler tick: fetch the scoreboard snapshot, create and post the reports for a newly final
+    week, or re-render and post just the charts changed by stat corrections to already posted weeks
+    (or that were posted from partial data because some ESPN requests failed, up to MAX_RESUME_ATTEMPTS times).
+
+    Every tick also snapshots the projections of the week being played before its games lock (the
+    projection accuracy report compares against them).
+
+    The first tick (no saved state) only records the snapshot, so starting the scheduler mid-season
+    doesn't re-post weeks that were already posted by hand.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        state (dict): Scheduler state from load_scheduler_state (updated in place)
+        post (Callable, optional): Function called with each image path and caption to post it. Defaults to None.
+        season_start_date (datetime.datetime, optional): Needed by the trade reports. Defaults to None.
+
+    Returns:
+        dict: The updated state
+    """
+    snapshot = get_scoreboard_snapshot(league)
+    capture_upcoming_projections(league, snapshot)
+    if state['last_posted_week'] is None:
+        state['scores'] = snapshot
+        state['last_posted_week'] = max([int(wk) for wk in snapshot], default=0)
+        return state
+
+    newly_final, corrected = diff_snapshots(state['scores'], snapshot)
+    corrected = [wk for wk in corrected if wk <= state['last_posted_week']]
+    if len(newly_final) > 0:
+        ## Cumulative reports, so only the latest final week needs posting. Corrections to
+        ### earlier weeks are picked up by building it from fresh data.
+        week = newly_final[-1]
+        if len(corrected) > 0:
+            apply_stat_corrections(league, week, corrected[0], season_start_date)
+        asyncio.run(pipeline.run_weekly_reports(league, week, post=post, season_start_date=season_start_date))
+        state['last_posted_week'] = week
+        state['posted_at'] = time.time()
+        state['resume_attempts'] = 0
+    elif len(corrected) > 0:
+        week = state['last_posted_week']
+        apply_stat_corrections(league, week, corrected[0], season_start_date)
+        asyncio.run(pipeline.run_weekly_reports(league, week, post=post, season_start_date=season_start_date,
+                                                post_cached=False))
+    elif needs_resume(state):
+        ## Fetches that failed last time resume from their checkpoints, only the filled in charts are re-posted.
+        ### Capped, so data ESPN never serves doesn't keep the scheduler polling every 30 minutes for good.
+        state['resume_attempts'] = state.get('resume_attempts', 0) + 1
+        asyncio.run(pipeline.run_weekly_reports(league, state['last_posted_week'], post=post,
+                                                season_start_date=season_start_date, post_cached=False))
+    state['scores'] = snapshot
+    return state
+
+def get_poll_interval(state: dict) -> datetime.timedelta:
+    """Poll often only once the next week could be final (a week after the last post) or while the last post is
+    incomplete, rarely otherwise."""
+    if not needs_resume(state) and time.time() - state.get('posted_at', 0) < NEXT_WEEK_AFTER.total_seconds():
+        return CORRECTION_POLL
+    return WAITING_POLL
+
+def run_scheduler(league: League, post: Callable = None, season_start_date=None, path: str = None):
+    """
+    Run until interrupted, creating and posting each week's reports once ESPN finalizes the week,
+    and re-posting charts changed by later stat corrections.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        post (Callable, optional): Function called with each image path and caption to post it. Defaults to None.
+        season_start_date (datetime.datetime, optional): Needed by the trade reports. Defaults to None.
+        path (str, optional): Scheduler state path. Defaults to get_scheduler_state_path(league).
+    """
+    path = path or get_scheduler_state_path(league)
+    state = load_scheduler_state(path)
+    while True:
+        state = poll_once(league, state, post, season_start_date)
+        save_scheduler_state(state, path)
+        time.sleep(get_poll_interval(state).total_seconds())
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from espn_api.football import League
+
+def get_schedule_matrix(league: League, team_names: list, first_week: int, last_week: int) -> np.ndarray:
+    """
+    Opponents for each week from first_week through last_week, as indexes into team_names.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        team_names (list): Team names, defines the team index order
+        first_week (int): First week to include
+        last_week (int): Last week to include
+
+    Returns:
+        np.ndarray: Array of shape (weeks, teams), entry [w, t] is the index of team t's opponent
+    """
+    team_index = {name: i for i, name in enumerate(team_names)}
+    opponents = np.zeros((max(last_week - first_week + 1, 0), len(team_names)), dtype=int)
+    for team in league.teams:
+        for w in range(first_week, last_week+1):
+            opponents[w - first_week, team_index[team.team_name]] = team_index[team.schedule[w-1].team_name]
+    return opponents
+
+def get_remaining_schedule(league: League, week: int, team_names: list) -> np.ndarray:
+    """
+    Opponents for every regular season week after `week`, as indexes into team_names.
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        week (int): Last week already played
+        team_names (list): Team names, defines the team index order
+
+    Returns:
+        np.ndarray: Array of shape (remaining weeks, teams), entry [w, t] is the index of team t's opponent
+    """
+    return get_schedule_matrix(league, team_names, week+1, league.settings.reg_season_count)
+
+def get_n_byes(playoff_team_count: int) -> int:
+    """Number of first round byes for a single elimination bracket (e.g. 2 for 6 playoff teams)."""
+    return int(2**np.ceil(np.log2(playoff_team_count))) - playoff_team_count
+
+def _simulate_seed_counts(means: np.ndarray, stds: np.ndarray, opponents: np.ndarray,
+                          current_wins: np.ndarray, current_points: np.ndarray,
+                          n_sims: int, seed: int) -> np.ndarray:
+    """
+    Simulate the rest of the season n_sims times as one batch of (sims x weeks x teams) arrays.
+
+    Returns:
+        np.ndarray: (teams x teams) counts of how often each team finished at each seed
+    """
+    n_teams = len(means)
+    rng = np.random.default_rng(seed)
+    scores = rng.normal(means, stds, size=(n_sims, opponents.shape[0], n_teams))
+    opp_scores = np.take_along_axis(scores, np.broadcast_to(opponents, scores.shape), axis=2)
+    wins = current_wins + (scores > opp_scores).sum(axis=1) + 0.5*(scores == opp_scores).sum(axis=1)
+    points = current_points + scores.sum(axis=1)
+
+    ## Seed by wins, then points for. Points are < 1e5 so they can only break ties in wins.
+    order = np.argsort(-(wins*1e5 + points), axis=1)
+    seeds = np.empty_like(order)
+    np.put_along_axis(seeds, order, np.arange(n_teams)[None, :], axis=1)
+    return np.stack([np.bincount(seeds[:, t], minlength=n_teams) for t in range(n_teams)])
+
+def simulate_playoff_odds(weekly_scores_df: pd.DataFrame, opponents: np.ndarray, team_names: list,
+                          playoff_team_count: int, n_byes: int = None,
+                          n_sims: int = 100_000, n_jobs: int = 1,
+                          chunk_size: int = 25_000, seed: int = 0) -> pd.DataFrame:
+    """
+    Monte Carlo playoff, bye and seed probabilities from per-team normal score distributions
+    fit to the scores so far.
+
+    Args:
+        weekly_scores_df (pd.DataFrame): DataFrame of records/scores by week by team from data_utils.get_weekly_scores_df
+        opponents (np.ndarray): Remaining schedule from get_remaining_schedule
+        team_names (list): Team names in the same order as `opponents`
+        playoff_team_count (int): Number of teams that make the playoffs
+        n_byes (int, optional): Number of first round byes. Defaults to None (from playoff_team_count).
+        n_sims (int, optional): Number of simulated seasons. Defaults to 100,000.
+        n_jobs (int, optional): Number of processes to spread the chunks across. Defaults to 1.
+        chunk_size (int, optional): Simulations per batch, bounds memory. Defaults to 25,000.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: One row per team with 'playoff_pct', 'bye_pct' and 'seed_1' ... 'seed_N' probabilities
+    """
+    if n_byes is None:
+        n_byes = get_n_byes(playoff_team_count)
+    by_team = weekly_scores_df.groupby('team').agg(mean=('score', 'mean'), std=('score', 'std'),
+                                                   wins=('win_flg', 'sum'), points=('score', 'sum'),
+                                                   ties=('result', lambda x: (x == 'T').sum())).loc[team_names]
+    ## Fall back to the league-wide spread for teams with too few weeks to estimate their own
+    stds = by_team['std'].fillna(weekly_scores_df['score'].std()).to_numpy()
+    args = (by_team['mean'].to_numpy(), stds, opponents,
+            (by_team['wins'] + 0.5*by_team['ties']).to_numpy(), by_team['points'].to_numpy())
+
+    chunks = [min(chunk_size, n_sims - start) for start in range(0, n_sims, chunk_size)]
+    seeds = np.random.SeedSequence(seed).generate_state(len(chunks))
+    if n_jobs > 1:
+        with ProcessPoolExecutor(n_jobs) as pool:
+            counts = list(pool.map(_simulate_seed_counts, *zip(*[args + (n, s) for n, s in zip(chunks, seeds)])))
+    else:
+        counts = [_simulate_seed_counts(*args, n, s) for n, s in zip(chunks, seeds)]
+    seed_probs = np.sum(counts, axis=0) / n_sims
+
+    odds_df = pd.DataFrame(seed_probs, index=team_names,
+                           columns=[f'seed_{i+1}' for i in range(len(team_names))])
+    odds_df.insert(0, 'bye_pct', seed_probs[:, :n_byes].sum(axis=1))
+    odds_df.insert(0, 'playoff_pct', seed_probs[:, :playoff_team_count].sum(axis=1))
+    return odds_df.rename_axis('team').reset_index()
+
+def get_playoff_odds_df(league: League, weekly_scores_df: pd.DataFrame, week: int, **kwargs) -> pd.DataFrame:
+    """
+    Playoff odds for the league after `week` (see simulate_playoff_odds for kwargs).
+
+    Args:
+        league (League): ESPN fantasy league obj/connection
+        weekly_scores_df (pd.DataFrame): DataFrame from data_utils.get_weekly_scores_df
+        week (int): Last week already played
+
+    Returns:
+        pd.DataFrame: DataFrame from simulate_playoff_odds
+    """
+    team_names = [team.team_name for team in league.teams]
+    opponents = get_remaining_schedule(league, week, team_names)
+    return simulate_playoff_odds(weekly_scores_df[weekly_scores_df['week'] <= week], opponents, team_names,
+                                 league.settings.playoff_team_count, **kwargs)
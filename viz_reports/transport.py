@@ -0,0 +1,109 @@
+import time
+import bisect
+import threading
+import requests
+from collections import Counter
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = 10
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+class TransportMetrics():
+    ## Running totals for every request that goes through a Transport (recorded from the fetch/dataset threads)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.n_requests = 0
+        self.bytes_received = 0
+        self.status_codes = Counter()
+        ### Count of requests per latency bucket, last bucket is everything over LATENCY_BUCKETS_MS[-1]
+        self.latency_histogram = [0]*(len(LATENCY_BUCKETS_MS)+1)
+        self.total_latency_ms = 0.0
+
+    def record(self, response: requests.Response, latency_ms: float):
+        n_bytes = len(response.content)
+        bucket = bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)
+        with self.lock:
+            self.n_requests += 1
+            self.bytes_received += n_bytes
+            self.status_codes[response.status_code] += 1
+            self.latency_histogram[bucket] += 1
+            self.total_latency_ms += latency_ms
+
+    def summary(self) -> dict:
+        """Totals so far, json-ready (written to each week's manifest and served at /metrics)."""
+        labels = [f'<={b}ms' for b in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}ms']
+        with self.lock:
+            return {'n_requests': self.n_requests,
+                    'bytes_received': self.bytes_received,
+                    'mean_latency_ms': self.total_latency_ms/self.n_requests if self.n_requests else 0,
+                    'latency_histogram': dict(zip(labels, self.latency_histogram)),
+                    'status_codes': {str(code): n for code, n in self.status_codes.items()}}
+
+
+class SessionBackend():
+    ## Default backend: send the request over the pooled session.
+    ### Other backends (record/replay, caching) implement the same `send` and usually wrap this one.
+    def send(self, session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+        return session.request(method, url, **kwargs)
+
+
+class Transport():
+    """One keep-alive, connection pooled, gzip-enabled HTTP session with default timeouts and
+    metrics, that every ESPN request goes through (see install_espn_transport).
+    """
+    def __init__(self, backend=None, timeout: float = DEFAULT_TIMEOUT, pool_maxsize: int = 10):
+        self.backend = backend or SessionBackend()
+        self.timeout = timeout
+        self.metrics = TransportMetrics()
+        self.session = requests.Session()
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'})
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        response = self.backend.send(self.session, method, url, **kwargs)
+        self.metrics.record(response, (time.perf_counter() - start)*1000)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+
+_transport = None
+
+def get_transport() -> Transport:
+    """Get the shared Transport, creating it on first use."""
+    global _transport
+    if _transport is None:
+        _transport = Transport()
+    return _transport
+
+def set_backend(backend) -> Transport:
+    """Swap the backend of the shared Transport (e.g. for record/replay or caching)."""
+    transport = get_transport()
+    transport.backend = backend
+    return transport
+
+
+class _RequestsShim():
+    ## Stand-in for the `requests` module inside espn_api so its module-level requests.get/post calls
+    ### go through the shared Transport. Everything else (exceptions etc.) is passed through to requests.
+    def get(self, url, **kwargs):
+        return get_transport().get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return get_transport().post(url, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+def install_espn_transport():
+    """Route espn_api's internal HTTP calls through the shared Transport. Call before creating a League."""
+    from espn_api.requests import espn_requests
+    espn_requests.requests = _RequestsShim()
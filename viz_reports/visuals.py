@@ -1,220 +1,223 @@
 import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
 from espn_api.football import League
 
 import data_utils as du
+import activity_log as al
+import counterfactual as cf
+from power_rankings import INITIAL_RATING
+import projections as pj
+import head_to_head as h2h
+import chart_toolkit as tk
+import name_formatting as nf
 
 def biggest_steals_chart(draft_df: pd.DataFrame, week_number: int,
                          n_steals_to_plot: int = 10,
                          steals_after_rd: int = 1,
-                         bar_color = '#31a354'): # '#998ec3' - purple
+                         bar_color = '#31a354', # '#998ec3' - purple
+                         formats: tuple = ('png',)):
     """Create a chart of the biggest steals from the draft, as defined by points above/below expected from
-     a linear regression modeling fantasy points compared to position avg. as a factor of draft pick.
+     a linear regression modeling fantasy points over replacement level as a factor of draft pick.
 
     Args:
-        draft_df (pd.DataFrame): DataFrame of draft results from data_utils.get_draft_df
+        draft_df (pd.DataFrame): DataFrame of draft results from data_utils.get_draft_vor_df
+            (with 'points_above_pred')
         week_number (int): Week number for the fantasy season.
         n_steals_to_plot (int, optional): Number of players to include. Defaults to 10.
         steals_after_rd (int, optional): Number of initial rounds to exclude to define a player 
             as a "steal". Defaults to 1.
-    """
-    ## Very basic model to determine "expected points" based on position and draft position
-    reg = LinearRegression().fit(np.array(draft_df['overall_pick']).reshape(-1, 1),
-                                draft_df['points_above_avg'])
-
-    draft_df['preds'] = reg.predict(np.array(draft_df['overall_pick']).reshape(-1, 1))
-    draft_df['points_above_pred'] = draft_df['points_above_avg'] - draft_df['preds']
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
 
+    Returns:
+        str: Path to the saved chart
+    """
     ## Biggest steals plot
     biggest_steals_after_rd = (draft_df[draft_df['round_num'] > steals_after_rd]
                                 .nlargest(n_steals_to_plot, 'points_above_pred', keep = 'all')
                                 .sort_values('points_above_pred'))
-    biggest_steals_after_rd['player_name_short'] = biggest_steals_after_rd['player_name'].apply(lambda x: x[0] + '. ' + x.split(' ')[1] if not x.endswith('D/ST') else x)
-    biggest_steals_after_rd['owner_name_short'] = biggest_steals_after_rd['team_owner'].apply(lambda x: x[0] + '. ' + x.split(' ')[1])
+    biggest_steals_after_rd['player_name_short'] = nf.short_names(biggest_steals_after_rd['player_name'])
+    biggest_steals_after_rd['owner_name_short'] = nf.short_names(biggest_steals_after_rd['team_owner'])
     biggest_steals_after_rd['x_label'] = biggest_steals_after_rd['player_name_short'] + '\n' + biggest_steals_after_rd['owner_name_short'] + ' Pick #' + biggest_steals_after_rd['overall_pick'].astype(str)
-    plt.figure(figsize=(21,16))
-    plt.style.use('fivethirtyeight')
-    ax = biggest_steals_after_rd.plot(kind='barh', y = 'points_above_pred', x = 'x_label',
-                                    color= bar_color,
-                                    legend = None)
-    ax.set_ylabel('')
-    ax.set_xlabel('', fontsize=10) # 'Points Above Expected'
-    plt.yticks(fontsize=7)
-    plt.xticks(fontsize=10)
-    plt.title(f"Biggest Steals after Rd. {steals_after_rd}\nThrough Week {week_number}", fontsize=10)
-    plt.savefig(f'data/plots/biggest-steals-week-{week_number}.png', dpi=300, bbox_inches='tight')
+    path = f'data/plots/biggest-steals-week-{week_number}.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, biggest_steals_after_rd['x_label'], biggest_steals_after_rd['points_above_pred'], bar_color,
+                title = f"Biggest Steals after Rd. {steals_after_rd}\nThrough Week {week_number}",
+                title_size = 10, label_size = 7) # xlabel 'Points Above Expected'
+        ax.tick_params(axis = 'x', labelsize = 10)
+    return path
 
 
 def biggest_busts_chart(draft_df: pd.DataFrame, week_number: int,
                         n_busts_to_plot: int = 10,                        
                         busts_lte_rd: int = 4,
-                        bar_color = '#de2d26'): # '#f1a340' - orange
+                        bar_color = '#de2d26', # '#f1a340' - orange
+                        formats: tuple = ('png',)):
     """Create a chart of the biggest busts from the draft, as defined by points above/below expected from
-     a linear regression modeling fantasy points compared to position avg. as a factor of draft pick.
+     a linear regression modeling fantasy points over replacement level as a factor of draft pick.
 
     Args:
-        draft_df (pd.DataFrame): DataFrame of draft results from data_utils.get_draft_df
+        draft_df (pd.DataFrame): DataFrame of draft results from data_utils.get_draft_vor_df
+            (with 'points_above_pred')
         week_number (int): Week number for the fantasy season
         n_busts_to_plot (int, optional): Number of players to include. Defaults to 10.
         busts_lte_rd (int, optional): Last (maximum) round that a player can be called a 
             a "bust". Defaults to 4.
-    """
-    ## Very basic model to determine "expected points" based on position and draft position
-    reg = LinearRegression().fit(np.array(draft_df['overall_pick']).reshape(-1, 1),
-                                draft_df['points_above_avg'])
-    draft_df['preds'] = reg.predict(np.array(draft_df['overall_pick']).reshape(-1, 1))
-    draft_df['points_above_pred'] = draft_df['points_above_avg'] - draft_df['preds']
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
 
+    Returns:
+        str: Path to the saved chart
+    """
     ## Biggest busts plot
     biggest_busts_first_rds = (draft_df[draft_df['round_num'] <= busts_lte_rd]
                             .nsmallest(n_busts_to_plot, 'points_above_pred', keep = 'all')
                             .sort_values('points_above_pred', ascending = False))
-    biggest_busts_first_rds['player_name_short'] = biggest_busts_first_rds['player_name'].apply(lambda x: x[0] + '. ' + x.split(' ')[1])
-    biggest_busts_first_rds['owner_name_short'] = biggest_busts_first_rds['team_owner'].apply(lambda x: x[0] + '. ' + x.split(' ')[1])
+    biggest_busts_first_rds['player_name_short'] = nf.short_names(biggest_busts_first_rds['player_name'])
+    biggest_busts_first_rds['owner_name_short'] = nf.short_names(biggest_busts_first_rds['team_owner'])
     biggest_busts_first_rds['x_label'] = biggest_busts_first_rds['player_name_short'] + '\n' + biggest_busts_first_rds['owner_name_short'] + ' Pick #' + biggest_busts_first_rds['overall_pick'].astype(str)
-    plt.figure(figsize=(21,16))
-    plt.style.use('fivethirtyeight')
-    ax = biggest_busts_first_rds.plot(kind='barh', y = 'points_above_pred', x = 'x_label',
-                                    color = bar_color,
-                                    legend = None)
-    ax.set_ylabel('')
-    ax.set_xlabel('', fontsize=10) # 'Points Above Expected'
-    plt.yticks(fontsize=7)
-    plt.xticks(fontsize=10)
-    plt.title(f"Biggest Busts of Rds. 1 - 4\nThrough Week {week_number}", fontsize=10)
-    plt.savefig(f'data/plots/biggest-busts-week-{week_number}.png', dpi=300, bbox_inches='tight')
-
+    path = f'data/plots/biggest-busts-week-{week_number}.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, biggest_busts_first_rds['x_label'], biggest_busts_first_rds['points_above_pred'], bar_color,
+                title = f"Biggest Busts of Rds. 1 - 4\nThrough Week {week_number}",
+                title_size = 10, label_size = 7) # xlabel 'Points Above Expected'
+        ax.tick_params(axis = 'x', labelsize = 10)
+    return path
+
+
+def _get_sub_totals(lineup_df: pd.DataFrame, full_sub_df: pd.DataFrame, sub_totals_df: pd.DataFrame) -> pd.DataFrame:
+    """Owner/player sub totals for the bench charts from whichever of the inputs is given."""
+    if sub_totals_df is not None:
+        return sub_totals_df
+    if full_sub_df is None:
+        full_sub_df = du.get_full_sub_df(lineup_df)
+    return du.get_sub_totals_df(full_sub_df)
 
 def total_points_left_on_bench_chart(lineup_df: pd.DataFrame, week: int,
-                                     bar_color = '#08519c'): # '#f1a340' - orange
+                                     bar_color = '#08519c', # '#f1a340' - orange
+                                     full_sub_df: pd.DataFrame = None,
+                                     sub_totals_df: pd.DataFrame = None,
+                                     formats: tuple = ('png',)):
     """Bar chart of "points left on the table" by team based on not starting 
      the right people
 
     Args:
         lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
         week (int): Week number
+        full_sub_df (pd.DataFrame, optional): Subs from data_utils.get_full_sub_df, computed from lineup_df if None.
+        sub_totals_df (pd.DataFrame, optional): Owner/player totals from data_utils.get_sub_totals_df(_chunked),
+            used instead of full_sub_df if given.
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
     """
 
     ### Gather the subs that should've been made
-    unique_week_team_lineup = lineup_df.groupby(['team_name', 'week']).size().reset_index().drop(columns = 0)
-    sub_dfs = []
-    for i, row in unique_week_team_lineup.iterrows():
-        sub_lineup_df = lineup_df[(lineup_df['week'] == row['week']) & 
-                                (lineup_df['team_name'] == row['team_name'])]
-        sub_df = du.get_optimal_subs(sub_lineup_df)
-        sub_dfs.append(sub_df)
-    full_sub_df = pd.concat(sub_dfs).reset_index()
-    full_sub_df['potential_extra_points'] = full_sub_df['points'] - full_sub_df['sub_for_player_points']
+    sub_totals_df = _get_sub_totals(lineup_df, full_sub_df, sub_totals_df)
 
     ### Visualize missed opportunities by team
-    subs_pts_by_team = full_sub_df.groupby('team_owner').agg({'potential_extra_points': sum,
-                                        'index': len}).rename(columns = {'index': 'n_subs'}).reset_index()
+    subs_pts_by_team = sub_totals_df.groupby('team_owner').agg({'potential_extra_points': 'sum',
+                                        'n_subs': 'sum'}).reset_index()
     subs_pts_by_team['bar_label'] = subs_pts_by_team['team_owner'] + ' (' + subs_pts_by_team['n_subs'].astype(str)  + ')'
 
-    ax = (subs_pts_by_team.sort_values(by='potential_extra_points').plot(x = 'bar_label', y = 'potential_extra_points',
-                                                        title = f'Extra Points Left on Bench Through Week {week}\n(Number of substitutions in parens.)', 
-                                                        color = bar_color,
-                                                        kind = 'barh', legend = None))
-    ax.title.set_size(16)
-    ax.set_xlabel("")
-    ax.set_ylabel("")
-    plt.savefig(f'data/plots/total-points-on-bnch-week-{week}.png', dpi=300, bbox_inches='tight')
+    subs_pts_by_team = subs_pts_by_team.sort_values(by='potential_extra_points')
+    path = f'data/plots/total-points-on-bnch-week-{week}.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, subs_pts_by_team['bar_label'], subs_pts_by_team['potential_extra_points'], bar_color,
+                title = f'Extra Points Left on Bench Through Week {week}\n(Number of substitutions in parens.)',
+                title_size = 16)
+    return path
 
 def if_only_wouldve_started_owner_chart(lineup_df: pd.DataFrame, week: int,
                                          n_players_per_team: int = 2,
-                                         bar_color = '#f1a340'): # '#08519c' '#f1a340' - orange
+                                         bar_color = '#f1a340', # '#08519c' '#f1a340' - orange
+                                         full_sub_df: pd.DataFrame = None,
+                                         sub_totals_df: pd.DataFrame = None,
+                                        formats: tuple = ('png',)):
     """Create bar chart of the top X players that each team should have started throughout the year 
 
     Args:
         lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
         week (int): Week number
         n_players_per_team (int, optional): Number of players to plot for each team. Defaults to 2.
+        full_sub_df (pd.DataFrame, optional): Subs from data_utils.get_full_sub_df, computed from lineup_df if None.
+        sub_totals_df (pd.DataFrame, optional): Owner/player totals from data_utils.get_sub_totals_df(_chunked),
+            used instead of full_sub_df if given.
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
     """
     ### Gather the subs that should've been made
-    unique_week_team_lineup = lineup_df.groupby(['team_name', 'week']).size().reset_index().drop(columns = 0)
-    sub_dfs = []
-    for i, row in unique_week_team_lineup.iterrows():
-        sub_lineup_df = lineup_df[(lineup_df['week'] == row['week']) & 
-                                (lineup_df['team_name'] == row['team_name'])]
-        sub_df = du.get_optimal_subs(sub_lineup_df)
-        sub_dfs.append(sub_df)
-    full_sub_df = pd.concat(sub_dfs).reset_index()
-    full_sub_df['potential_extra_points'] = full_sub_df['points'] - full_sub_df['sub_for_player_points']
+    sub_totals_df = _get_sub_totals(lineup_df, full_sub_df, sub_totals_df)
 
     ### Create a grouped bar chart...  (or attempt)
-    potential_points_by_team_and_player = (full_sub_df
-                                        .groupby(['team_owner', 'player_name'])
-                                        .agg({'potential_extra_points': sum}))
+    potential_points_by_team_and_player = sub_totals_df.set_index(['team_owner', 'player_name'])
 
     top_n_subs_by_owner = (potential_points_by_team_and_player['potential_extra_points']
                         .groupby('team_owner', group_keys=False).nlargest(n_players_per_team).reset_index())
 
-    top_n_subs_by_owner['owner_first_name'] = top_n_subs_by_owner['team_owner'].apply(lambda x: x.split(' ')[0] if x.split(' ')[0] != "Matthew" else
-                                                                                                                f"Matt {x.split(' ')[1][0]}.")
+    top_n_subs_by_owner['owner_first_name'] = nf.first_names(top_n_subs_by_owner['team_owner'])
     top_n_subs_by_owner['bar_label'] = top_n_subs_by_owner['owner_first_name'] + " would've started " + top_n_subs_by_owner['player_name']
 
-    ax = top_n_subs_by_owner.sort_values(by = 'potential_extra_points').plot(y = 'potential_extra_points', x = 'bar_label',
-                                                                            legend = None, kind = 'barh',
-                                                                            color = bar_color, #'#08519c', #bar_color,
-                                                                            title = 'If only...')
-    ax.set_xlabel("Potential extra points gained")
-    ax.set_ylabel("")
-    plt.savefig(f'data/plots/if-only-wouldve-started-owner-{week}.png', dpi=300, bbox_inches='tight')
+    top_n_subs_by_owner = top_n_subs_by_owner.sort_values(by = 'potential_extra_points')
+    path = f'data/plots/if-only-wouldve-started-owner-{week}.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, top_n_subs_by_owner['bar_label'], top_n_subs_by_owner['potential_extra_points'], bar_color,
+                title = 'If only...', xlabel = "Potential extra points gained")
+    return path
 
 
 def if_only_wouldve_started_chart(lineup_df: pd.DataFrame, week: int, top_n: int = 10,
-                                  bar_color = '#08519c'): # '#f1a340' - orange
+                                  bar_color = '#08519c', # '#f1a340' - orange
+                                  full_sub_df: pd.DataFrame = None,
+                                  sub_totals_df: pd.DataFrame = None,
+                                  formats: tuple = ('png',)):
     """Create bar chart of top X players that should have been started by a particular team through a given week of the season.
 
     Args:
         lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
         week (int): Week number
         top_n (int, optional): Number of players to include in plot. Defaults to 10.
-        """
+        full_sub_df (pd.DataFrame, optional): Subs from data_utils.get_full_sub_df, computed from lineup_df if None.
+        sub_totals_df (pd.DataFrame, optional): Owner/player totals from data_utils.get_sub_totals_df(_chunked),
+            used instead of full_sub_df if given.
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
+    """
     ### Gather the subs that should've been made
-    unique_week_team_lineup = lineup_df.groupby(['team_name', 'week']).size().reset_index().drop(columns = 0)
-    sub_dfs = []
-    for i, row in unique_week_team_lineup.iterrows():
-        sub_lineup_df = lineup_df[(lineup_df['week'] == row['week']) & 
-                                (lineup_df['team_name'] == row['team_name'])]
-        sub_df = du.get_optimal_subs(sub_lineup_df)
-        sub_dfs.append(sub_df)
-    full_sub_df = pd.concat(sub_dfs).reset_index()
-    full_sub_df['potential_extra_points'] = full_sub_df['points'] - full_sub_df['sub_for_player_points']
+    sub_totals_df = _get_sub_totals(lineup_df, full_sub_df, sub_totals_df)
 
     ### Top owner/player subs (and how many times)
-    potential_points_by_team_and_player = (full_sub_df
-                                        .groupby(['team_owner', 'player_name'])
-                                        .agg({'potential_extra_points': sum,
-                                                'index': len})
+    potential_points_by_team_and_player = (sub_totals_df
                                         .sort_values('potential_extra_points', ascending = False)
-                                        .head(top_n).rename(columns = {'index': 'n_subs'}).reset_index())
+                                        .head(top_n).reset_index(drop = True))
 
-    potential_points_by_team_and_player['owner_first_name'] = potential_points_by_team_and_player['team_owner'].apply(lambda x: x.split(' ')[0] if x.split(' ')[0] != "Matthew" else
-                                                                                                                f"Matt {x.split(' ')[1][0]}.")
+    potential_points_by_team_and_player['owner_first_name'] = nf.first_names(potential_points_by_team_and_player['team_owner'])
     potential_points_by_team_and_player['bar_label'] = (potential_points_by_team_and_player['owner_first_name'] + 
                                                         " would've started " + potential_points_by_team_and_player['player_name'] + 
                                                         ' (' + potential_points_by_team_and_player['n_subs'].astype(str) + ')')
 
-    ax = (potential_points_by_team_and_player.sort_values(by = 'potential_extra_points')
-        .plot(y = 'potential_extra_points', x = 'bar_label', legend = None, 
-                color = bar_color,
-                kind = 'barh', title = 'If only...'))
-    ax.set_xlabel("Potential extra points gained")
-    ax.set_ylabel("")
-    plt.savefig(f'data/plots/if-only-wouldve-started-{week}.png', dpi=300, bbox_inches='tight')
+    potential_points_by_team_and_player = potential_points_by_team_and_player.sort_values(by = 'potential_extra_points')
+    path = f'data/plots/if-only-wouldve-started-{week}.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, potential_points_by_team_and_player['bar_label'], potential_points_by_team_and_player['potential_extra_points'],
+                bar_color, title = 'If only...', xlabel = "Potential extra points gained")
+    return path
 
 
-def record_vs_league_chart(weekly_scores_df, week, heatmap_color = 'Greens'):
+def record_vs_league_chart(weekly_scores_df, week, heatmap_color = 'Greens', formats: tuple = ('png',)):
     """Make a heatmap of team's records against the entire league week to week (and overall) 
 
     Args:
         weekly_scores_df (pd.DataFrame): DataFrame of records/scores by week by team
         week (int): Week number
         heatmap_color (str): Color scale to use for heatmap
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
     """
 
     ## Create a DataFrame with the overall record across all weeks.
@@ -239,9 +242,9 @@ def record_vs_league_chart(weekly_scores_df, week, heatmap_color = 'Greens'):
     ## Restructure data for heatmap
     weekly_and_overall_records_df = (pd.concat([weekly_scores_df, overall_records])
                                     .reset_index(drop = True))
-    weekly_and_overall_records_df['label'] = weekly_and_overall_records_df.apply(lambda x:
-                                            x['result'] if x['week'] != 'Overall'
-                                            else x['record_for_week'], axis = 1)
+    weekly_and_overall_records_df['label'] = weekly_and_overall_records_df['result'].where(
+                                            weekly_and_overall_records_df['week'] != 'Overall',
+                                            weekly_and_overall_records_df['record_for_week'])
 
     heatmap_df = weekly_and_overall_records_df.pivot(index = ["team"], columns = "week", values="win_pct_week")
     labels_df  = weekly_and_overall_records_df.pivot(index = ["team"], columns = "week", values="label")
@@ -254,24 +257,27 @@ def record_vs_league_chart(weekly_scores_df, week, heatmap_color = 'Greens'):
     labels_df.sort_index(level=0, inplace=True)
 
     ## Plot Heatmap
-    fig, ax = plt.subplots()
-    sns.set(font_scale=1.1)
-    ax = sns.heatmap(heatmap_df, annot = labels_df, cmap=heatmap_color, fmt = '', annot_kws={"fontsize":8.5})
-    ax.set_title('Records vs. Entire League by Week')
-    plt.ylabel('')
-    plt.savefig(f'data/plots/record-vs-league-week-{week}.png', dpi=300, bbox_inches='tight')
+    path = f'data/plots/record-vs-league-week-{week}.png'
+    with tk.chart(path, style = 'heatmap', formats = formats) as (fig, ax):
+        tk.heatmap(ax, heatmap_df, labels_df, heatmap_color, title = 'Records vs. Entire League by Week')
+    return path
 
 
 ## Barplot of records above and below expected based on records vs. entire league 
 def luckiest_records_chart(weekly_scores_df, week,
                            lucky_color = 'tab:green', # '#998ec3' - purple
-                           unlucky_color = 'tab:red'): # '#f1a340' - orange
+                           unlucky_color = 'tab:red', # '#f1a340' - orange
+                           formats: tuple = ('png',)):
     """Create a barchart showing the team's records compare with what is expected from their
      winning percentage against the entire league each week
 
     Args:
         weekly_scores_df (pd.DataFrame): DataFrame of records/scores by week by team
         week (int): Week number
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
     """
 
     ## Create a DataFrame with the overall record across all weeks.
@@ -296,62 +302,318 @@ def luckiest_records_chart(weekly_scores_df, week,
     ### Get the luckiest records
     luckiest_records = overall_records.sort_values('win_pct_over_expected',
                                                 ascending = False).copy()
-    luckiest_records['color'] = luckiest_records['win_pct_over_expected'].apply(lambda x: 'Red' if x < 0 else 'Green')
-    fig, ax = plt.subplots()
-    palette = {'Red': unlucky_color, 
-            'Green': lucky_color
-            }
-    sns.set_style('darkgrid')
-    ax = sns.barplot(data = luckiest_records, y = "team", x = "win_pct_over_expected",
-                    hue = "color", palette = palette)
-    ax.legend_.remove()
-    ax.set_title(f'Luckiest Records in the League Through Week {week}', fontsize = 14)
-    plt.ylabel('')
-    plt.xlabel('Actual Win Pct. Minus Overall Win Pct. vs. Entire League')
-    plt.savefig(f'data/plots/luckiest-records-week-{week}.png', dpi=300, bbox_inches='tight')
-
-
-def number_trades_acquisition_chart(league, acquisition_type):
-    """Gather data on number of trades per team, make a chart of it, and save it.
+    colors = [unlucky_color if x < 0 else lucky_color for x in luckiest_records['win_pct_over_expected']]
+    luckiest_records = luckiest_records.iloc[::-1] ## Luckiest at the top
+    path = f'data/plots/luckiest-records-week-{week}.png'
+    with tk.chart(path, style = 'darkgrid', formats = formats) as (fig, ax):
+        tk.barh(ax, luckiest_records['team'], luckiest_records['win_pct_over_expected'], colors[::-1],
+                title = f'Luckiest Records in the League Through Week {week}', title_size = 14,
+                xlabel = 'Actual Win Pct. Minus Overall Win Pct. vs. Entire League')
+    return path
+
+
+def number_trades_acquisition_chart(activity_df, acquisition_type, formats: tuple = ('png',)):
+    """Count the number of trades/waiver claims/acquisitions per team from the local activity log,
+     make a chart of it, and save it.
 
     Args:
-        league (League): ESPN fantasy league
-        acquisition_type (str): either "trades" or "acquisitions"
+        activity_df (pd.DataFrame): DataFrame from activity_log.load_activity_log_df
+        acquisition_type (str): either "trades", "waivers" or "acquisitions"
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
     """
-    teams = []
-    owners = []
-    trades = []
-    acquisitions = []
-    for team in league.teams:
-        teams.append(team.team_name)
-        owners.append(team.owner)
-        trades.append(team.trades)
-        acquisitions.append(team.acquisitions)
-
-    trades_df = pd.DataFrame({'team': teams, 'owner': owners, 'trades': trades, 'acquisitions': acquisitions})
-    trades_df.sort_values(acquisition_type, ascending=True).plot(kind='barh', x = 'owner', y = acquisition_type,
-                                                     title=f'Number of {acquisition_type.title()} by Owner', legend = False)
-    plt.xlabel('')
-    plt.ylabel('')
-    plt.savefig(f'data/plots/number-of-{acquisition_type}.png', dpi=300, bbox_inches='tight')
-
-
-def best_worst_trade_chart(trade_eval_df, best_or_worst):
+    trades_df = al.get_transaction_counts_df(activity_df).sort_values(acquisition_type, ascending=True)
+    path = f'data/plots/number-of-{acquisition_type}.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, trades_df['team_owner'], trades_df[acquisition_type], None,
+                title = f'Number of {acquisition_type.title()} by Owner')
+    return path
+
+
+def best_worst_trade_chart(trade_eval_df, best_or_worst, formats: tuple = ('png',)):
     """plot the best or worst trades based on the evaluations done in data_utils.
 
     Args:
         trade_eval_df (_type_): DataFrame from du.get_trade_evalutions_df
         best_or_worst (str): either "best" or "worst"
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
     """
-    trade_eval_df['label'] = trade_eval_df.apply(lambda x:
-        f"{x['team'].owner}\ntrade {', '.join([p.name for p in x['players_lost']])}\nfor {', '.join([p.name for p in x['players_added']])}"
-        ,axis = 1)
     if best_or_worst == 'best':
-        trade_eval_df.sort_values('point_diff',ascending=False).head().sort_values('point_diff').plot(kind='barh',
-            x='label', y='point_diff', title='Best Trades of the Year', legend=False)
+        plot_df = trade_eval_df.sort_values('point_diff',ascending=False).head().sort_values('point_diff')
     elif best_or_worst == 'worst':
-        trade_eval_df.sort_values('point_diff').head().sort_values('point_diff', ascending=False).plot(kind='barh',
-            x='label', y='point_diff', title='Worst Trades of the Year', legend=False)
-    plt.ylabel('')
-    plt.xlabel('ROS Value for Roster')
-    plt.savefig(f'data/plots/{best_or_worst}-trades.png', dpi=300, bbox_inches='tight')
+        plot_df = trade_eval_df.sort_values('point_diff').head().sort_values('point_diff', ascending=False)
+    path = f'data/plots/{best_or_worst}-trades.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, nf.trade_labels(plot_df), plot_df['point_diff'], None,
+                title = f'{best_or_worst.title()} Trades of the Year', xlabel = 'ROS Value for Roster')
+    return path
+
+
+def draft_value_over_time_chart(draft_df: pd.DataFrame, value_by_week: np.ndarray, week_number: int,
+                                n_players_to_plot: int = 6,
+                                steals_after_rd: int = 1,
+                                busts_lte_rd: int = 4,
+                                steal_color = '#31a354',
+                                bust_color = '#de2d26',
+                                formats: tuple = ('png',)):
+    """Small multiples of cumulative points above expected by week for the biggest steals and busts
+     (as of the given week) from the draft.
+
+    Args:
+        draft_df (pd.DataFrame): DataFrame of draft results from data_utils.get_draft_vor_df
+        value_by_week (np.ndarray): (players x weeks) array from data_utils.get_draft_value_by_week
+        week_number (int): Week number for the fantasy season
+        n_players_to_plot (int, optional): Number of steals and of busts to include. Defaults to 6.
+        steals_after_rd (int, optional): Number of initial rounds to exclude for steals. Defaults to 1.
+        busts_lte_rd (int, optional): Last round that a player can be called a "bust". Defaults to 4.
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
+    """
+    current_value = value_by_week[:, -1]
+    round_nums = draft_df['round_num'].to_numpy()
+    steal_idx = np.where(round_nums > steals_after_rd)[0]
+    steal_idx = steal_idx[np.argsort(-current_value[steal_idx])][:n_players_to_plot]
+    bust_idx = np.where(round_nums <= busts_lte_rd)[0]
+    bust_idx = bust_idx[np.argsort(current_value[bust_idx])][:n_players_to_plot]
+
+    weeks = np.arange(1, value_by_week.shape[1]+1)
+    path = f'data/plots/draft-value-over-time-week-{week_number}.png'
+    with tk.chart(path, figsize=(3*n_players_to_plot, 6), nrows=2, ncols=n_players_to_plot,
+                  sharex=True, sharey=True, formats = formats) as (fig, axes):
+        axes = np.array(axes).reshape(2, n_players_to_plot)
+        for row, (idxs, color) in enumerate([(steal_idx, steal_color), (bust_idx, bust_color)]):
+            for col in range(n_players_to_plot):
+                ax = axes[row, col]
+                if col >= len(idxs):
+                    ax.set_visible(False)
+                    continue
+                i = idxs[col]
+                ax.plot(weeks, value_by_week[i], color = color, linewidth = 2)
+                ax.axhline(0, color = 'grey', linewidth = 1)
+                ax.set_title(f"{draft_df['player_name'].iloc[i]}\nPick #{draft_df['overall_pick'].iloc[i]}", fontsize=8)
+                ax.tick_params(labelsize=7)
+        fig.suptitle(f"Draft Value Over Time (Points Above Expected)\nThrough Week {week_number}", fontsize=10)
+    return path
+
+
+def playoff_odds_chart(playoff_odds_df: pd.DataFrame, week: int, heatmap_color = 'Greens', formats: tuple = ('png',)):
+    """Make a heatmap of each team's chances of finishing at each seed, with their overall
+     playoff and bye chances, from simulating the rest of the season.
+
+    Args:
+        playoff_odds_df (pd.DataFrame): DataFrame from simulation.get_playoff_odds_df
+        week (int): Week number
+        heatmap_color (str): Color scale to use for heatmap
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
+    """
+    heatmap_df = (playoff_odds_df.sort_values(['playoff_pct', 'bye_pct'], ascending = False)
+                  .set_index('team')
+                  .rename(columns = lambda x: x.replace('seed_', '') if x.startswith('seed_') else
+                                              {'playoff_pct': 'Playoffs', 'bye_pct': 'Bye'}[x]))
+    labels_df = (heatmap_df*100).round().astype(int).astype(str) + '%'
+    labels_df = labels_df.mask(heatmap_df < 0.005, '')
+
+    path = f'data/plots/playoff-odds-week-{week}.png'
+    with tk.chart(path, style = 'heatmap', figsize = (12, 6), formats = formats) as (fig, ax):
+        tk.heatmap(ax, heatmap_df, labels_df, heatmap_color, title = f'Playoff Odds After Week {week}',
+                   xlabel = 'Seed', cbar = False, vmin = 0, vmax = 1)
+    return path
+
+
+def schedule_swap_chart(swap_df: pd.DataFrame, week: int, heatmap_color = 'RdYlGn', formats: tuple = ('png',)):
+    """Make a heatmap of every team's record if they'd had each other team's schedule.
+
+    Args:
+        swap_df (pd.DataFrame): Teams x schedules DataFrame of wins from schedule_luck.get_schedule_luck_df
+        week (int): Week number
+        heatmap_color (str): Color scale to use for heatmap
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
+    """
+    ## Sort by actual wins (the diagonal) so each row's own schedule is easy to compare against
+    sort_order = list(pd.Series(np.diag(swap_df), index = swap_df.index).sort_values(ascending = False).index)
+    heatmap_df = swap_df.loc[sort_order, sort_order]
+    labels_df = (heatmap_df.map(lambda x: f'{x:g}') + '-' + (week - heatmap_df).map(lambda x: f'{x:g}'))
+
+    path = f'data/plots/schedule-swap-week-{week}.png'
+    with tk.chart(path, style = 'heatmap', figsize = (12, 8), formats = formats) as (fig, ax):
+        tk.heatmap(ax, heatmap_df, labels_df, heatmap_color, title = f"Records With Each Team's Schedule Through Week {week}",
+                   xlabel = "Schedule", annot_size = 7, cbar = False)
+    return path
+
+
+def schedule_luck_chart(distribution_df: pd.DataFrame, week: int, heatmap_color = 'Blues', formats: tuple = ('png',)):
+    """Make a heatmap of how often each team would have each number of wins over random schedules,
+     with their actual record in the label.
+
+    Args:
+        distribution_df (pd.DataFrame): DataFrame of random schedule records from schedule_luck.get_schedule_luck_df
+        week (int): Week number
+        heatmap_color (str): Color scale to use for heatmap
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
+    """
+    distribution_df = distribution_df.sort_values('mean_wins', ascending = False)
+    distribution_df['team_label'] = (distribution_df['team'] + ' (' + distribution_df['actual_wins'].map(lambda x: f'{x:g}') +
+                                     ' W, ' + (distribution_df['pct_schedules_as_good']*100).round().astype(int).astype(str) + '%)')
+    heatmap_df = (distribution_df.set_index('team_label').filter(regex = '^wins_')
+                  .rename(columns = lambda x: x.replace('wins_', '')))
+    labels_df = ((heatmap_df*100).round().astype(int).astype(str) + '%').mask(heatmap_df < 0.005, '')
+
+    path = f'data/plots/schedule-luck-week-{week}.png'
+    with tk.chart(path, style = 'heatmap', figsize = (12, 8), formats = formats) as (fig, ax):
+        tk.heatmap(ax, heatmap_df, labels_df, heatmap_color,
+                   title = f'Wins Over Random Schedules Through Week {week}\n(% of schedules at least as good as actual in parens.)',
+                   xlabel = 'Wins', annot_size = 7, cbar = False)
+    return path
+
+
+def perfect_manager_chart(standings_df: pd.DataFrame, week: int, heatmap_color = 'Greens', formats: tuple = ('png',)):
+    """Make a heatmap of each team's record if one or both sides of every matchup had started
+     their optimal lineup
+
+    Args:
+        standings_df (pd.DataFrame): DataFrame from counterfactual.get_counterfactual_standings_df
+        week (int): Week number
+        heatmap_color (str): Color scale to use for heatmap
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
+    """
+    heatmap_df = pd.DataFrame(index = standings_df['team'])
+    labels_df = pd.DataFrame(index = standings_df['team'])
+    for scenario, label in cf.SCENARIO_LABELS.items():
+        wins = standings_df[f'{scenario}_wins'].to_numpy()
+        losses = standings_df[f'{scenario}_losses'].to_numpy()
+        heatmap_df[label] = wins/(wins + losses)
+        labels_df[label] = [f'{w:g}-{l:g}' for w, l in zip(wins, losses)]
+
+    path = f'data/plots/perfect-manager-week-{week}.png'
+    with tk.chart(path, style = 'heatmap', formats = formats) as (fig, ax):
+        tk.heatmap(ax, heatmap_df, labels_df, heatmap_color, title = f'Records With Perfect Lineups Through Week {week}',
+                   xlabel = '', cbar = False)
+    return path
+
+
+def points_left_on_wire_chart(wire_gains_df: pd.DataFrame, week: int,
+                              bar_color = '#756bb1',
+                              formats: tuple = ('png',)):
+    """Bar chart of extra points each team could have scored by picking up the best available
+     free agents each week
+
+    Args:
+        wire_gains_df (pd.DataFrame): DataFrame from waiver_wire.get_wire_gains_df
+        week (int): Week number
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
+    """
+    wire_pts_by_team = (wire_gains_df.groupby('team_owner').agg({'wire_gain': 'sum'})
+                        .reset_index().sort_values(by = 'wire_gain'))
+    path = f'data/plots/points-left-on-wire-week-{week}.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, wire_pts_by_team['team_owner'], wire_pts_by_team['wire_gain'], bar_color,
+                title = f'Extra Points Left on the Waiver Wire Through Week {week}', title_size = 16)
+    return path
+
+
+def power_rankings_chart(ratings_df: pd.DataFrame, week: int,
+                         up_color = 'tab:green', down_color = 'tab:red',
+                         formats: tuple = ('png',)):
+    """Bar chart of each team's power rating after the given week, with the change in rank
+     from the week before in the label
+
+    Args:
+        ratings_df (pd.DataFrame): Rating history from power_rankings.update_power_rankings
+        week (int): Week number
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
+    """
+    current = ratings_df[ratings_df['week'] == week].set_index('team')
+    previous = ratings_df[ratings_df['week'] == week - 1].set_index('team')
+    current = current.assign(rank_change = (previous['rank'] - current['rank']).fillna(0).astype(int),
+                             rating_change = (current['rating'] - previous['rating']).fillna(0))
+    current['bar_label'] = (current['rank'].astype(str) + '. ' + current.index +
+                            current['rank_change'].apply(lambda x: f' (+{x})' if x > 0 else f' ({x})' if x < 0 else ''))
+    current = current.sort_values('rating')
+
+    colors = [up_color if x >= 0 else down_color for x in current['rating_change']]
+    path = f'data/plots/power-rankings-week-{week}.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, current['bar_label'], current['rating'] - INITIAL_RATING, colors,
+                title = f'Power Rankings After Week {week}', title_size = 14,
+                xlabel = 'Rating vs. Average (color = change this week)')
+    return path
+
+
+def beat_projections_chart(projection_errors_df: pd.DataFrame, week: int,
+                           over_color = 'tab:green', under_color = 'tab:red',
+                           formats: tuple = ('png',)):
+    """Bar chart of how many points each team's starters scored above/below their ESPN projections
+
+    Args:
+        projection_errors_df (pd.DataFrame): DataFrame from projections.get_projection_errors_df
+        week (int): Week number
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
+    """
+    by_team = pj.summarize_projection_errors(projection_errors_df, 'team_owner').sort_values('total_over_projection')
+    colors = [over_color if x >= 0 else under_color for x in by_team['total_over_projection']]
+
+    path = f'data/plots/beat-projections-week-{week}.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, by_team['team_owner'], by_team['total_over_projection'], colors,
+                title = f'Points Above Projections Through Week {week}', title_size = 14,
+                xlabel = 'Starter Points Minus ESPN Projection')
+    return path
+
+
+def rivalry_chart(h2h_index, season: int, week: int,
+                  team_a_color = '#08519c', team_b_color = '#f1a340',
+                  formats: tuple = ('png',)):
+    """Stacked bar chart of the all-time series record for each of the week's matchups
+
+    Args:
+        h2h_index (HeadToHeadIndex): Index from head_to_head.update_head_to_head
+        season (int): Season year
+        week (int): Week number
+        formats (tuple, optional): Formats to save the chart in (PNG is always saved). Defaults to ('png',).
+
+    Returns:
+        str: Path to the saved chart
+    """
+    pairs = h2h.get_week_pairs(h2h_index, season, week)
+    records = [h2h_index.record(a, b) for a, b in pairs]
+    labels = [f"{a} vs. {b}\n(avg. margin {r['avg_margin']:+.1f})" for (a, b), r in zip(pairs, records)]
+    wins = np.array([r['wins'] for r in records])
+    losses = np.array([r['losses'] for r in records])
+
+    path = f'data/plots/rivalries-week-{week}.png'
+    with tk.chart(path, formats = formats) as (fig, ax):
+        tk.barh(ax, labels, wins, team_a_color)
+        tk.barh(ax, labels, losses, team_b_color, left = wins, title = f'All-Time Series for Week {week} Matchups',
+                title_size = 14, xlabel = 'Wins', label_size = 8)
+        for i, (w, l) in enumerate(zip(wins, losses)):
+            ax.text(w/2, i, str(w), ha = 'center', va = 'center', color = 'white', fontsize = 9)
+            ax.text(w + l/2, i, str(l), ha = 'center', va = 'center', color = 'white', fontsize = 9)
+    return path
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from espn_api.football import League
+
+import data_utils as du
+
+FREE_AGENT_COLUMNS = ['week', 'player_id', 'player_name', 'position', 'points']
+
+class FreeAgentIndex():
+    ## Top-k free agent scores for every (position, week), as compact (positions x weeks x k) arrays
+    ### sorted best first, so "best available pickups at a position in a week" is a slice instead of a scan.
+    def __init__(self, positions: list, weeks: list, points: np.ndarray, names: np.ndarray, player_ids: np.ndarray):
+        self.positions = positions
+        self.weeks = weeks
+        self.points = points
+        self.names = names
+        self.player_ids = player_ids
+        self._pos_idx = {pos: i for i, pos in enumerate(positions)}
+        self._week_idx = {week: i for i, week in enumerate(weeks)}
+
+    def top(self, position: str, week: int, n: int) -> tuple:
+        """Names and points of the best n free agents at the position in the week."""
+        if position not in self._pos_idx or week not in self._week_idx:
+            return np.array([], dtype=object), np.array([], dtype=np.float32)
+        p, w = self._pos_idx[position], self._week_idx[week]
+        points = self.points[p, w, :n]
+        keep = ~np.isnan(points)
+        return self.names[p, w, :n][keep], points[keep]
+
+
+def get_free_agent_week_df(league: League, week: int, size: int = 500) -> pd.DataFrame:
+    """
+    The top `size` free agents and their points for the week, one request (see the registry's 'free_agents'
+    dataset, which fetches every week once per run and shares them with the replacement levels).
+
+    Returns:
+        pd.DataFrame: One row per player with FREE_AGENT_COLUMNS
+    """
+    pool = league.free_agents(week=week, size=size)
+    return pd.DataFrame([(week, p.playerId, p.name, p.position, p.stats.get(week, {}).get('points', 0)) for p in pool],
+                        columns = FREE_AGENT_COLUMNS)
+
+def get_top_k_per_position(starter_counts: dict) -> int:
+    """Most free agents that could ever start at one position (its own slots plus every flex it fits)."""
+    counts = {}
+    for pos, n in starter_counts.items():
+        if 'D/ST' not in pos and '/' in pos:
+            eligible = pos.split('/')
+        elif pos == 'OP':
+            eligible = ['RB', 'WR', 'TE', 'QB']
+        elif pos == 'DP':
+            eligible = ['DT', 'DE', 'LB', 'CB', 'S']
+        else:
+            eligible = [pos]
+        for e in eligible:
+            counts[e] = counts.get(e, 0) + n
+    return max(counts.values())
+
+def build_free_agent_index(free_agents_df: pd.DataFrame, k: int, rostered: set = None) -> FreeAgentIndex:
+    """
+    Index each week's free agent pool by position, keeping only the top k scorers.
+
+    Args:
+        free_agents_df (pd.DataFrame): Free agents of every week (get_free_agent_week_df rows)
+        k (int): Number of free agents to keep per position/week
+        rostered (set, optional): (week, player id) of players who were on a roster that week. ESPN's
+            free agent list is who's available now, so these are left out of that week's pool. Defaults to None.
+
+    Returns:
+        FreeAgentIndex: index of the top k free agents per position/week
+    """
+    weeks = sorted(free_agents_df['week'].unique())
+    positions = sorted(free_agents_df['position'].unique())
+    pos_idx = {pos: i for i, pos in enumerate(positions)}
+    points = np.full((len(positions), len(weeks), k), np.nan, dtype=np.float32)
+    names = np.empty((len(positions), len(weeks), k), dtype=object)
+    player_ids = np.full((len(positions), len(weeks), k), -1, dtype=np.int64)
+    if rostered:
+        keys = pd.MultiIndex.from_frame(free_agents_df[['week', 'player_id']])
+        free_agents_df = free_agents_df[~keys.isin(list(rostered))]
+
+    for w, week in enumerate(weeks):
+        pool = free_agents_df[free_agents_df['week'] == week]
+        pool_points = pool['points'].to_numpy(dtype=np.float32)
+        pool_pos = pool['position'].map(pos_idx).to_numpy()
+        pool_names = pool['player_name'].to_numpy(dtype=object)
+        pool_ids = pool['player_id'].to_numpy(dtype=np.int64)
+        for p in range(len(positions)):
+            at_pos = np.where(pool_pos == p)[0]
+            best = at_pos[np.argsort(-pool_points[at_pos], kind='stable')][:k]
+            points[p, w, :len(best)] = pool_points[best]
+            names[p, w, :len(best)] = pool_names[best]
+            player_ids[p, w, :len(best)] = pool_ids[best]
+    return FreeAgentIndex(positions, weeks, points, names, player_ids)
+
+def get_wire_gains_df(lineup_df: pd.DataFrame, fa_index: FreeAgentIndex, starter_counts: dict) -> pd.DataFrame:
+    """
+    For every team/week, how many more points the optimal lineup would have scored if the
+    team could also have picked up any free agent that week.
+
+    Each roster is padded with the indexed top-k free agents at every position and solved in one
+    batch with data_utils.get_optimal_scores_df. Each team/week is evaluated independently (every
+    team gets first pick of the whole pool). Free agents who were on any roster that week are left
+    out, so nobody is counted both as a rostered player and as a pickup.
+
+    Args:
+        lineup_df (pd.DataFrame): DataFrame of all lineups and scores for each team/week
+        fa_index (FreeAgentIndex): Index from build_free_agent_index
+        starter_counts (dict): A dictionary containing the number of starters for each position
+
+    Returns:
+        pd.DataFrame: One row per team/week with 'optimal_score', 'optimal_with_wire_score' and 'wire_gain'
+    """
+    team_weeks = lineup_df[['team_name', 'team_owner', 'week']].drop_duplicates()
+    k = fa_index.points.shape[2]
+
+    ## Free agent rows for every (position, week), then repeated for each team playing that week
+    fa_rows = pd.DataFrame({'position': np.repeat(fa_index.positions, len(fa_index.weeks)*k),
+                            'week': np.tile(np.repeat(fa_index.weeks, k), len(fa_index.positions)),
+                            'player_name': fa_index.names.ravel(),
+                            'player_id': fa_index.player_ids.ravel(),
+                            'points': fa_index.points.ravel().astype(float)}).dropna(subset = ['points'])
+    rostered = pd.MultiIndex.from_frame(lineup_df[['week', 'player_id']])
+    fa_rows = fa_rows[~pd.MultiIndex.from_frame(fa_rows[['week', 'player_id']]).isin(rostered)]
+    fa_rows['slot_position'] = 'FA'
+    fa_lineups = team_weeks.merge(fa_rows, on = 'week')
+
+    roster = lineup_df[['team_name', 'team_owner', 'week', 'player_name', 'position', 'slot_position', 'points']]
+    optimal = du.get_optimal_scores_df(roster, starter_counts)
+    with_wire = du.get_optimal_scores_df(pd.concat([roster, fa_lineups], ignore_index = True), starter_counts)
+
+    gains_df = (optimal[['team_name', 'week', 'optimal_score']]
+                .merge(with_wire[['team_name', 'week', 'optimal_score']].rename(columns = {'optimal_score': 'optimal_with_wire_score'}),
+                       on = ['team_name', 'week'])
+                .merge(team_weeks, on = ['team_name', 'week']))
+    gains_df['wire_gain'] = gains_df['optimal_with_wire_score'] - gains_df['optimal_score']
+
+    return gains_df
+
+def get_league_wire_gains_df(lineup_df: pd.DataFrame, free_agents_df: pd.DataFrame, starter_counts: dict,
+                             week: int) -> pd.DataFrame:
+    """get_wire_gains_df for weeks 1 through `week`, from the free agent pools of the 'free_agents' dataset.
+
+    Note that ESPN only returns who is a free agent now, so earlier weeks are approximated
+    with the current pool's stats for those weeks.
+    """
+    lineup_df = lineup_df[lineup_df['week'] <= week]
+    rostered = set(zip(lineup_df['week'], lineup_df['player_id']))
+    fa_index = build_free_agent_index(free_agents_df[free_agents_df['week'] <= week],
+                                      get_top_k_per_position(starter_counts), rostered)
+    return get_wire_gains_df(lineup_df, fa_index, starter_counts)